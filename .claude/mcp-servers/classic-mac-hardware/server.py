@@ -12,13 +12,27 @@ Compatible with RumpusFTP server on Classic Macs:
 """
 
 import asyncio
+import collections
+import concurrent.futures
+import ftplib
+import functools
+import hashlib
+import io
 import json
+import logging
 import os
+import random
+import re
+import socket
 import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
 from ftplib import FTP
 from pathlib import Path
 from typing import Any, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 
 from mcp.server import Server
 from mcp.types import (
@@ -31,6 +45,512 @@ from mcp.types import (
 )
 import mcp.server.stdio
 
+logger = logging.getLogger("classic-mac-hardware")
+
+
+# FTP connection settings
+FTP_TIMEOUT = 10           # Seconds before connect/command gives up
+FTP_BREAKER_TTL = 15.0     # Seconds to fail fast after a machine refused/timed out
+FTP_MAX_RETRIES = 3        # Attempts per operation (reconnects between tries)
+FTP_BASE_DELAY = 1.0       # First retry backoff in seconds (doubles per attempt)
+FTP_RETRY_CAP = 15.0       # Upper bound on a single retry backoff
+FTP_OPERATION_DELAY = 0.5  # Average seconds between operations (RumpusFTP stability)
+FTP_BURST = 3              # Operations allowed back-to-back before throttling
+FTP_BLOCKSIZE = 65536      # Bytes per read/write on binary transfers (ftplib default: 8K)
+FTP_POOL_SIZE = 2          # Control connections kept per machine (Mac FTPds allow few)
+FTP_PROBE_IDLE = 5.0       # Pooled connections idle less than this are trusted unchecked
+FTP_WORKER_THREADS = 16    # Blocking tool calls in flight at once (I/O-bound, not CPU-bound)
+FTP_PIPELINE_DEPTH = 8     # DELE commands sent ahead of their replies in bulk deletes
+
+# Retro68's LaunchAPPL client, as installed in the Docker image
+LAUNCHAPPL = "/opt/Retro68-build/toolchain/bin/LaunchAPPL"
+
+# Default seconds execute_binary waits for LaunchAPPL (callers may pass less)
+LAUNCHAPPL_TIMEOUT = 60
+
+# Seconds between machines.json stat() checks; bursts of requests share one
+CONFIG_STAT_TTL = 1.0
+
+# Seconds a list_directory result is served from cache (RumpusFTP has no
+# change notification; mutating tools invalidate their machine's entries)
+LISTING_CACHE_TTL = 10.0
+
+# Leftover files removed by cleanup_machine scope=old_files
+CLEANUP_SUFFIXES = ('.old', '.bak', '.tmp')
+
+# Errors that mean the control connection is unusable and must be re-opened
+# (socket-level only - local file errors are also OSError and must not retry).
+# Permanent 5xx replies (ftplib.error_perm) are never retried.
+FTP_CONNECTION_ERRORS = (
+    EOFError, ConnectionError, TimeoutError, ftplib.error_temp, ftplib.error_reply
+)
+
+# One `ls -l` style LIST line: mode, 7 more fields (links, owner, group,
+# size, month, day, time/year), then the name, which may contain spaces.
+# Fullmatched against each line, already split on CR, LF or CRLF (classic
+# Mac servers end lines with a bare CR); lines with fewer fields
+# ("total 12") don't match
+LIST_LINE = re.compile(rb'(\S)\S*(?:[ \t]+\S+){7}[ \t]+(.+)')
+
+
+# Prompt templates: metadata served by list_prompts, and the str.format
+# templates get_prompt fills in with the prompt's arguments
+PROMPTS = [
+    {
+        "name": "deploy-and-test",
+        "description": "Deploy binary to Classic Mac, run tests, fetch logs",
+        "arguments": [
+            {
+                "name": "machine",
+                "description": "Machine to deploy to",
+                "required": True
+            },
+            {
+                "name": "platform",
+                "description": "Platform: mactcp, opentransport, appletalk",
+                "required": True
+            },
+            {
+                "name": "test_name",
+                "description": "Test to run (e.g., tcp-connect)",
+                "required": True
+            }
+        ]
+    },
+    {
+        "name": "compare-platforms",
+        "description": "Deploy to all machines, run same test, compare logs",
+        "arguments": [
+            {
+                "name": "test_name",
+                "description": "Test to run on all platforms",
+                "required": True
+            }
+        ]
+    },
+    {
+        "name": "debug-crash",
+        "description": "Fetch crash logs and correlate with source code",
+        "arguments": [
+            {
+                "name": "machine",
+                "description": "Machine that crashed",
+                "required": True
+            }
+        ]
+    }
+]
+
+PROMPT_TEMPLATES = {
+    "deploy-and-test": """Deploy and test PeerTalk on {machine}:
+
+1. Deploy binary:
+   /deploy {machine} {platform}
+
+2. Run test:
+   Test: {test_name}
+
+3. Fetch logs:
+   /fetch-logs {machine}
+
+4. Analyze results and report any errors
+""",
+    "compare-platforms": """Compare test results across all platforms:
+
+Test: {test_name}
+
+Machines:
+{machines_list}
+
+For each machine:
+1. Deploy appropriate binary
+2. Run test: {test_name}
+3. Fetch logs
+4. Compare results
+
+Report differences in behavior, errors, or performance.
+""",
+    "debug-crash": """Debug crash on {machine}:
+
+1. Fetch latest logs from {machine}
+2. Identify crash location (last successful operation)
+3. Read corresponding source file
+4. Check for common Classic Mac pitfalls:
+   - ISR safety violations
+   - Byte ordering issues
+   - Alignment problems
+   - Memory allocation in callbacks
+5. Suggest fix with line numbers
+""",
+}
+
+
+@dataclass(frozen=True, slots=True)
+class MachineSpec:
+    """Connection settings for one machine, flattened from machines.json."""
+
+    host: str
+    port: int
+    username: str
+    password: str  # As written; may be a "${ENV_VAR}" reference
+    pipeline_depth: int
+    max_connections: int
+
+
+class MachineUnreachableError(Exception):
+    """A recent connect to the machine failed; raised without retrying."""
+
+
+class MacFTP(FTP):
+    """ftplib.FTP that caches the server's FEAT reply for the connection."""
+
+    _features: Optional[set[str]] = None
+    home: str = '/'        # Login directory, restored before each reuse
+    pipeline_depth: int = FTP_PIPELINE_DEPTH  # Per-machine, from machines.json
+    generation: int = 0    # FTPPool generation the connection was opened in
+    moved: bool = False    # CWD has run since the connection was last at `home`
+    released_at: float = 0.0  # time.monotonic() of the last return to the pool
+    _mlst_facts: Optional[str] = None  # Fact set last selected with OPTS MLST
+    _type: Optional[str] = None  # Last TYPE command the server accepted
+    _site_commands: Optional[set[str]] = None  # From SITE HELP, on first use
+
+    def has_feature(self, name: str) -> bool:
+        """Return True if the server advertises `name` (e.g. 'MLST') in FEAT."""
+        if self._features is None:
+            try:
+                lines = self.sendcmd('FEAT').splitlines()[1:-1]
+            except ftplib.error_perm:
+                lines = []  # Pre-RFC 2389 server: no optional features
+            self._features = {line.split()[0].upper() for line in lines if line.strip()}
+        return name.upper() in self._features
+
+    def connect(self, *args, **kwargs) -> str:
+        """
+        Connect, then turn off Nagle on the control socket.
+
+        Control traffic is a run of tiny commands (CWD, TYPE, PASV, DELE,
+        ...); with Nagle on, a command sent while the previous segment is
+        still unacknowledged waits for the Mac's delayed ACK. Keepalive
+        lets the kernel notice a Mac that was switched off mid-session.
+        """
+        welcome = super().connect(*args, **kwargs)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        return welcome
+
+    def ntransfercmd(self, cmd: str, rest=None):
+        """Open a data connection with Nagle off, so short transfers don't stall on their last segment."""
+        conn, size = super().ntransfercmd(cmd, rest)
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conn, size
+
+    def has_site_command(self, name: str) -> bool:
+        """Return True if SITE HELP lists `name` (e.g. 'RMDIR') as a SITE command."""
+        if self._site_commands is None:
+            try:
+                lines = self.sendcmd('SITE HELP').splitlines()[1:-1]
+            except ftplib.error_perm:
+                lines = []  # No SITE HELP: assume no SITE extensions
+            self._site_commands = {word.upper() for line in lines for word in line.split()}
+        return name.upper() in self._site_commands
+
+    def select_facts(self, facts: str) -> None:
+        """
+        Ask MLSD to send only `facts` (e.g. 'type;modify;') on each line.
+
+        OPTS MLST is only sent when the set changes, so a listing repeated
+        on a pooled connection costs no extra round trip.
+        """
+        if facts != self._mlst_facts:
+            try:
+                self.sendcmd(f'OPTS MLST {facts}')
+            except ftplib.error_perm:
+                pass  # No fact selection: the server sends its defaults
+            self._mlst_facts = facts
+
+    def sendcmd(self, cmd: str) -> str:
+        """Send a command; a TYPE the connection is already in is not resent."""
+        if cmd.startswith('TYPE ') and cmd == self._type:
+            return '200 Type unchanged'
+        resp = super().sendcmd(cmd)
+        if cmd.startswith('TYPE '):
+            self._type = cmd
+        return resp
+
+    def voidcmd(self, cmd: str) -> str:
+        """
+        Send a command expecting a 2xx reply, skipping a redundant TYPE.
+
+        retrbinary(), retrlines() and storfile() each set the transfer type
+        first; back-to-back transfers of the same type (a deploy's files,
+        a folder of logs) then pay one round trip for it, not one each.
+        """
+        if cmd.startswith('TYPE ') and cmd == self._type:
+            return '200 Type unchanged'
+        resp = super().voidcmd(cmd)
+        if cmd.startswith('TYPE '):
+            self._type = cmd
+        return resp
+
+    def cwd(self, dirname: str) -> str:
+        """Change directory, noting that the connection may have left `home`."""
+        self.moved = True
+        return super().cwd(dirname)
+
+    def mdtm(self, filename: str) -> Optional[float]:
+        """Return the file's modification time (MDTM) as a Unix timestamp."""
+        try:
+            resp = self.voidcmd(f'MDTM {filename}')
+        except ftplib.error_perm:
+            return None  # Unsupported, or not a plain file
+        try:
+            stamp = datetime.strptime(resp[4:18], '%Y%m%d%H%M%S')
+        except ValueError:
+            return None  # Reply in some other format: treat as no MDTM
+        return stamp.replace(tzinfo=timezone.utc).timestamp()
+
+    def storfile(self, cmd: str, fp) -> str:
+        """
+        Store a regular file in binary mode, like storbinary().
+
+        The data connection is fed with socket.sendfile(), which lets the
+        kernel copy straight from the page cache (os.sendfile) instead of
+        reading each block into Python first. sendfile() falls back to
+        plain send() on platforms without os.sendfile.
+        """
+        self.voidcmd('TYPE I')
+        with self.transfercmd(cmd) as conn:
+            conn.sendfile(fp)
+        return self.voidresp()
+
+    def retrfile(self, cmd: str, fp) -> int:
+        """
+        Retrieve a file in binary mode into `fp`, like retrbinary().
+
+        Each block is received into one reused buffer (recv_into) and
+        written from a view of it, so no new bytes object is allocated per
+        block. Returns the number of bytes written.
+        """
+        self.voidcmd('TYPE I')
+        buf = bytearray(FTP_BLOCKSIZE)
+        view = memoryview(buf)
+        total = 0
+        with self.transfercmd(cmd) as conn:
+            while n := conn.recv_into(buf):
+                fp.write(view[:n])
+                total += n
+        self.voidresp()
+        return total
+
+    def delete_many(self, names: list[str],
+                    depth: Optional[int] = None) -> tuple[list[str], list[tuple[str, str]]]:
+        """
+        Delete several files, keeping up to `depth` DELE commands in flight
+        (default: the connection's pipeline_depth).
+
+        Replies come back in command order, so the batch costs about
+        len(names) / depth round trips instead of one per file. Returns
+        (deleted names, [(name, reply)] for files the server refused with
+        a 5xx). Connection-level errors propagate.
+        """
+        depth = depth or self.pipeline_depth
+        deleted = []
+        failed = []
+        pending = collections.deque()
+
+        def collect():
+            name = pending.popleft()
+            try:
+                resp = self.getresp()
+            except ftplib.error_perm as e:
+                failed.append((name, str(e)))
+                return
+            if resp[:3] not in ('250', '200'):
+                raise ftplib.error_reply(resp)
+            deleted.append(name)
+
+        for name in names:
+            self.putcmd(f'DELE {name}')
+            pending.append(name)
+            if len(pending) >= depth:
+                collect()
+        while pending:
+            collect()
+        return deleted, failed
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter.
+
+    Allows short bursts of up to `capacity` operations while holding the
+    long-run average to `refill_rate` operations per second.
+    """
+
+    def __init__(self, capacity: float, refill_rate: float):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take one token, sleeping until one is available."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity,
+                              self.tokens + (now - self.last_refill) * self.refill_rate)
+            self.last_refill = now
+            if self.tokens < 1:
+                time.sleep((1 - self.tokens) / self.refill_rate)
+                self.tokens = 1
+                self.last_refill = time.monotonic()
+            self.tokens -= 1
+
+
+class FTPPool:
+    """
+    Per-machine pool of logged-in FTP connections.
+
+    A connection is checked out by exactly one caller at a time, so commands
+    never interleave on a control socket; operations on the same machine run
+    in parallel only by holding different connections. At most `maxsize`
+    connections exist per machine (or limits[machine_id], if set) and
+    further callers wait for one to be released. Connections that fail with
+    a connection-level error are closed instead of being returned.
+
+    A checked-out connection must not be handed to another thread or task:
+    ftplib reads replies synchronously, so two users of one control socket
+    consume each other's replies. Releasing a connection twice would put it
+    in the idle list twice and hand it to two callers, so it raises instead.
+
+    Connections leaving the pool are quit on a background thread: QUIT waits
+    for the server's 221, and that round trip shouldn't delay the caller
+    that released the connection (or a config reload's close_all).
+    """
+
+    def __init__(self, connect, maxsize: int = FTP_POOL_SIZE):
+        self._connect = connect  # machine_id -> logged-in MacFTP
+        self.maxsize = maxsize
+        self.limits: dict[str, int] = {}  # Per-machine overrides of maxsize
+        self._cond = threading.Condition()
+        self._idle: dict[str, list[MacFTP]] = {}
+        self._open: dict[str, int] = {}
+        self._busy: set[int] = set()  # id() of checked-out connections
+        self._generation = 0
+        self._closer = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="ftp-quit")
+
+    @contextmanager
+    def acquire(self, machine_id: str):
+        """Check out a live connection for `machine_id` for the with-block."""
+        ftp = self._checkout(machine_id)
+        try:
+            yield ftp
+        except ftplib.error_perm:
+            # A 5xx reply was read in full: the session is still in step
+            self._release(machine_id, ftp, reuse=True)
+            raise
+        except BaseException:
+            # Anything else may strike mid-transfer (a decode error in a
+            # listing, a local write failure) with the transfer's closing
+            # reply still unread; reusing the session would hand every
+            # later caller the previous command's reply
+            self._release(machine_id, ftp, reuse=False)
+            raise
+        else:
+            self._release(machine_id, ftp, reuse=True)
+
+    def _checkout(self, machine_id: str) -> MacFTP:
+        with self._cond:
+            while True:
+                idle = self._idle.get(machine_id)
+                if idle:
+                    ftp = idle.pop()
+                    break
+                if self._open.get(machine_id, 0) < self.limits.get(machine_id, self.maxsize):
+                    self._open[machine_id] = self._open.get(machine_id, 0) + 1
+                    ftp = None
+                    break
+                self._cond.wait()
+
+        if ftp is not None:
+            # A connection handed back less than FTP_PROBE_IDLE ago that never
+            # left its login directory is trusted and reused without sending
+            # anything, so it may be dead; a caller then fails with a
+            # connection error and _ftp_operation retries on a new one.
+            # Otherwise CWD home both checks liveness and resets the
+            # directory left by the last user
+            try:
+                if ftp.moved or time.monotonic() - ftp.released_at >= FTP_PROBE_IDLE:
+                    ftp.cwd(ftp.home)
+                    ftp.moved = False
+            except Exception:
+                ftp.close()  # Dead, or its state can't be reset: replace it
+            else:
+                with self._cond:
+                    self._busy.add(id(ftp))
+                return ftp
+
+        try:
+            ftp = self._connect(machine_id)
+        except BaseException:
+            with self._cond:
+                self._open[machine_id] -= 1
+                self._cond.notify()
+            raise
+        ftp.generation = self._generation
+        with self._cond:
+            self._busy.add(id(ftp))
+        return ftp
+
+    def _release(self, machine_id: str, ftp: MacFTP, reuse: bool) -> None:
+        with self._cond:
+            if id(ftp) not in self._busy:
+                raise RuntimeError("FTP connection released twice")
+            self._busy.discard(id(ftp))
+            if reuse and ftp.generation == self._generation:
+                ftp.released_at = time.monotonic()
+                self._idle.setdefault(machine_id, []).append(ftp)
+                self._cond.notify()
+                return
+        self._closer.submit(self._retire, machine_id, ftp)
+
+    def close_all(self, wait: bool = False) -> None:
+        """
+        Quit every idle connection (config reload and shutdown).
+
+        Connections checked out at the time are closed when released rather
+        than returned to the pool. With wait=True the QUITs are sent before
+        returning, as at shutdown; otherwise they finish in the background.
+        """
+        with self._cond:
+            self._generation += 1
+            idle = [(machine_id, ftp) for machine_id, conns in self._idle.items()
+                    for ftp in conns]
+            self._idle.clear()
+        for machine_id, ftp in idle:
+            if wait:
+                self._retire(machine_id, ftp)
+            else:
+                self._closer.submit(self._retire, machine_id, ftp)
+
+    def _retire(self, machine_id: str, ftp: MacFTP) -> None:
+        """Quit a connection that has left the pool, then free its slot."""
+        # The slot is only freed once the session is gone, so a Mac that
+        # serves a single session never sees a replacement log in early
+        self._quit(ftp)
+        with self._cond:
+            self._open[machine_id] -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _quit(ftp: MacFTP) -> None:
+        try:
+            ftp.quit()
+        except Exception:
+            ftp.close()
+
 
 class ClassicMacHardwareServer:
     """MCP Server for Classic Mac hardware access via FTP."""
@@ -39,7 +559,17 @@ class ClassicMacHardwareServer:
         """Initialize with machines configuration."""
         self.config_path = config_path
         self.machines = {}
-        self._config_mtime = 0
+        self.specs: dict[str, MachineSpec] = {}
+        self._config_stat = None  # (st_mtime_ns, st_size) of the loaded config
+        self._config_hash = None  # blake2s digest of the loaded config
+        self._config_stat_checked_at = 0.0
+        self._ftp_pool = FTPPool(self._connect_ftp)
+        self._ftp_buckets: dict[str, TokenBucket] = {}
+        self._list_cache: dict[tuple[str, str], tuple[float, list[str]]] = {}
+        self._breaker: dict[str, tuple[float, Exception]] = {}
+        self._ftp_features: dict[str, set[str]] = {}  # machine_id -> FEAT reply
+        self._launchappl_found = False  # Only a hit is cached: it may be installed later
+        self._config_cache: dict[str, tuple[dict, Any]] = {}  # key -> (machines, value)
         self._first_load = True
         self._reload_if_changed()  # Initial load
         self._first_load = False
@@ -53,47 +583,138 @@ class ClassicMacHardwareServer:
         self.server.list_prompts()(self.list_prompts)
         self.server.get_prompt()(self.get_prompt)
 
+        # Tool dispatch: name -> (handler, is_async)
+        self._tool_table = {
+            "list_machines": (self._tool_list_machines, True),
+            "reload_config": (self._tool_reload_config, False),
+            "test_connection": (self._tool_test_connection, True),
+            "list_directory": (self._tool_list_directory, False),
+            "create_directory": (self._tool_create_directory, False),
+            "delete_files": (self._tool_delete_files, False),
+            "deploy_binary": (self._tool_deploy_binary, False),
+            "fetch_logs": (self._tool_fetch_logs, True),
+            "execute_binary": (self._tool_execute_binary, True),
+            "cleanup_machine": (self._tool_cleanup_machine, True),
+            "upload_file": (self._tool_upload_file, False),
+            "download_file": (self._tool_download_file, False),
+        }
+
+        # Resource dispatch: mac://{machine}/{type}/... -> reader(ftp, machine, identifier)
+        self._resource_readers = {
+            "logs": self._read_logs,
+            "binary": self._read_binary,
+            "files": self._read_files,
+        }
+
+
     def _reload_if_changed(self) -> bool:
         """
         Hot-reload configuration if machines.json has changed.
         Returns True if config was reloaded.
+
+        The file is stat()ed at most once per CONFIG_STAT_TTL. Both mtime and
+        size are compared so editors that preserve mtime are still noticed.
+        When they differ, the contents are hashed and only re-parsed if the
+        hash changed too (a `touch` or identical re-save keeps the config and
+        its cached FTP connections).
         """
+        now = time.monotonic()
+        if now - self._config_stat_checked_at < CONFIG_STAT_TTL:
+            return False
+        self._config_stat_checked_at = now
+
         try:
-            current_mtime = os.path.getmtime(self.config_path)
-            if current_mtime > self._config_mtime:
-                self.machines = self._load_config()
-                self._config_mtime = current_mtime
-                print(f"✓ Reloaded config: {len(self.machines)} machines", file=sys.stderr)
+            st = os.stat(self.config_path)
+            current_stat = (st.st_mtime_ns, st.st_size)
+            if current_stat != self._config_stat:
+                with open(self.config_path, 'rb') as f:
+                    data = f.read()
+                self._config_stat = current_stat
+                digest = hashlib.blake2s(data).digest()
+                if digest == self._config_hash:
+                    return False
+                self._config_hash = digest
+                self.machines = self._load_config(data)
+                self.specs = self._build_specs(self.machines)
+                self._ftp_pool.limits = {
+                    machine_id: spec.max_connections for machine_id, spec in self.specs.items()
+                }
+                self._ftp_pool.close_all()  # Host/credentials may have changed
+                self._list_cache.clear()
+                self._ftp_features.clear()
+                logger.info("✓ Reloaded config: %d machines", len(self.machines))
                 return True
             return False
         except FileNotFoundError:
             if self._first_load:
-                print(f"ℹ No machines configured yet. Run /setup-machine to add Classic Mac hardware.", file=sys.stderr)
-                print(f"  Expected config at: {self.config_path}", file=sys.stderr)
+                logger.info("ℹ No machines configured yet. Run /setup-machine to add Classic Mac hardware.")
+                logger.info("  Expected config at: %s", self.config_path)
             return False
         except Exception as e:
-            print(f"⚠ Config reload failed: {e}", file=sys.stderr)
+            logger.warning("⚠ Config reload failed: %s", e)
             return False
 
-    def _load_config(self) -> dict:
-        """Load and validate machines configuration."""
+    def _load_config(self, data: bytes) -> dict:
+        """
+        Parse machines configuration from raw file contents.
+
+        Passwords are kept as written; "${ENV_VAR}" references are expanded
+        when a connection is opened (see _resolve_password).
+        """
         try:
-            with open(self.config_path) as f:
-                config = json.load(f)
-
-            # Expand environment variables in passwords
-            for machine_id, machine in config.items():
-                if 'ftp' in machine and 'password' in machine['ftp']:
-                    password = machine['ftp']['password']
-                    if password.startswith('${') and password.endswith('}'):
-                        env_var = password[2:-1]
-                        machine['ftp']['password'] = os.environ.get(env_var, '')
-
-            return config
+            return json.loads(data)
         except Exception as e:
-            print(f"Error loading config: {e}", file=sys.stderr)
+            logger.error("Error loading config: %s", e)
             return {}
 
+    @staticmethod
+    def _build_specs(machines: dict) -> dict[str, MachineSpec]:
+        """Flatten each machine's FTP settings; incomplete entries are skipped."""
+        specs = {}
+        for machine_id, machine in machines.items():
+            try:
+                ftp_config = machine['ftp']
+                specs[machine_id] = MachineSpec(
+                    host=ftp_config['host'],
+                    port=int(ftp_config.get('port', 21)),
+                    username=ftp_config['username'],
+                    password=ftp_config['password'],
+                    # Slow Macs (e.g. a Performa's FTPd) may want fewer commands in flight
+                    pipeline_depth=max(1, int(ftp_config.get('pipeline_depth', FTP_PIPELINE_DEPTH))),
+                    # Many Mac FTP servers only serve one session at a time
+                    max_connections=max(1, int(ftp_config.get('max_connections', FTP_POOL_SIZE)))
+                )
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning("⚠ Machine '%s' has incomplete ftp settings: %s", machine_id, e)
+        return specs
+
+    @staticmethod
+    def _resolve_password(password: str) -> str:
+        """Expand a "${ENV_VAR}" password reference; other values are literal."""
+        if password.startswith('${') and password.endswith('}'):
+            return os.environ.get(password[2:-1], '')
+        return password
+
+    def _cached_for_config(self, key: str, build):
+        """
+        Return build() computed once per loaded config.
+
+        Entries are keyed on the identity of self.machines, which a reload
+        replaces, so stale values are rebuilt without explicit invalidation.
+        """
+        cached = self._config_cache.get(key)
+        if cached is None or cached[0] is not self.machines:
+            cached = self._config_cache[key] = (self.machines, build())
+        return cached[1]
+
+    def _machine(self, machine_id: str) -> dict:
+        """Return the machine's config in one lookup, raising like _validate_machine_id."""
+        try:
+            return self.machines[machine_id]
+        except KeyError:
+            self._validate_machine_id(machine_id)
+            raise
+
     def _validate_machine_id(self, machine_id: str) -> None:
         """Validate machine ID and raise helpful error if invalid."""
         if machine_id not in self.machines:
@@ -104,32 +725,252 @@ class ClassicMacHardwareServer:
                 f"To add a new machine, run: /setup-machine"
             )
 
-    def _connect_ftp(self, machine_id: str) -> FTP:
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _split_path(remote_path: str) -> tuple[str, str]:
+        """
+        Split a remote path into (directory, filename); directory may be ''.
+
+        Accepts Mac colon paths ("Documents:TestData:file.txt") and Unix
+        slash paths ("/Documents/TestData/file.txt"), splitting on whichever
+        separator the path uses so the directory keeps the server's form.
+        """
+        sep = '/' if '/' in remote_path else ':'
+        directory, _, filename = remote_path.rpartition(sep)
+        if not directory and remote_path.startswith('/'):
+            directory = '/'  # "/file.txt" lives in the root directory
+        return directory, filename
+
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _resolve_local(path: str, mtime_ns: int) -> str:
+        """
+        Resolve a local path to an absolute one.
+
+        Cached per (path, mtime) so repeated launches of the same build skip
+        the per-component lstat walk; a rebuilt binary gets a fresh entry.
+        """
+        return str(Path(path).resolve())
+
+    def _connect_ftp(self, machine_id: str) -> MacFTP:
         """
         Create FTP connection to Classic Mac.
 
         Uses passive mode (PASV) for RumpusFTP compatibility.
         Plain FTP, not SFTP (Classic Macs don't support SFTP).
+
+        A failed connect opens a per-machine circuit breaker: for the next
+        FTP_BREAKER_TTL seconds calls fail immediately with
+        MachineUnreachableError instead of each waiting out FTP_TIMEOUT
+        against a Mac that is switched off.
         """
         self._validate_machine_id(machine_id)
 
-        machine = self.machines[machine_id]
-        ftp_config = machine['ftp']
-
-        ftp = FTP()
+        tripped = self._breaker.get(machine_id)
+        if tripped:
+            age = time.monotonic() - tripped[0]
+            if age < FTP_BREAKER_TTL:
+                raise MachineUnreachableError(
+                    f"Machine '{machine_id}' is unreachable ({tripped[1]}); "
+                    f"retrying in {FTP_BREAKER_TTL - age:.0f}s. "
+                    f"Run test_connection to check it now."
+                ) from tripped[1]
+
+        spec = self.specs.get(machine_id)
+        if spec is None:
+            raise ValueError(f"Machine '{machine_id}' has incomplete ftp settings in machines.json")
+
+        ftp = MacFTP(timeout=FTP_TIMEOUT)
         ftp.set_pasv(True)  # Passive mode for RumpusFTP
-        ftp.connect(ftp_config['host'], ftp_config.get('port', 21))
-        ftp.login(ftp_config['username'], ftp_config['password'])
+        try:
+            ftp.connect(spec.host, spec.port)
+        except (OSError, EOFError) as e:
+            self._breaker[machine_id] = (time.monotonic(), e)
+            raise
+        self._breaker.pop(machine_id, None)
+        ftp.login(spec.username, self._resolve_password(spec.password))
+        ftp.home = ftp.pwd()
+        ftp.moved = False
+        ftp.pipeline_depth = spec.pipeline_depth
+
+        # FEAT describes the server, not the session: ask once per machine,
+        # so later connections (pool refills, reconnects) skip the round trip
+        features = self._ftp_features.get(machine_id)
+        if features is None:
+            ftp.has_feature('MLST')
+            self._ftp_features[machine_id] = ftp._features
+        else:
+            ftp._features = features
 
         return ftp
 
+    def _invalidate_listing_cache(self, machine_id: str) -> None:
+        """Drop cached directory listings for a machine."""
+        for key in list(self._list_cache):  # Snapshot: worker threads may insert
+            if key[0] == machine_id:
+                self._list_cache.pop(key, None)
+
+    def _ftp_operation(self, machine_id: str, operation, mutates: bool = False):
+        """
+        Run operation(ftp) on a pooled FTP connection to the machine.
+
+        Pass mutates=True for operations that change remote files so cached
+        directory listings for the machine are invalidated afterwards.
+
+        The connection is held exclusively for the duration of the operation
+        (see FTPPool). Connection-level failures discard it and retry on a
+        fresh one after a jittered exponential backoff, so concurrent callers
+        hitting the same rebooting Mac don't retry in lockstep.
+        """
+        self._validate_machine_id(machine_id)
+        bucket = self._ftp_buckets.get(machine_id)
+        if bucket is None:
+            bucket = self._ftp_buckets.setdefault(
+                machine_id, TokenBucket(FTP_BURST, 1 / FTP_OPERATION_DELAY))
+
+        try:
+            for attempt in range(FTP_MAX_RETRIES):
+                bucket.acquire()  # Per attempt, so reused connections stay throttled
+                try:
+                    with self._ftp_pool.acquire(machine_id) as ftp:
+                        return operation(ftp)
+                except FTP_CONNECTION_ERRORS:
+                    if attempt == FTP_MAX_RETRIES - 1:
+                        raise
+                    time.sleep(min(FTP_RETRY_CAP,
+                                   FTP_BASE_DELAY * (2 ** attempt) * (1 + random.random() * 0.5)))
+        finally:
+            if mutates:
+                self._invalidate_listing_cache(machine_id)
+
+    def _list_entries(self, ftp: MacFTP, keep=None) -> list[tuple[str, str]]:
+        """
+        List the current directory as (name, type) pairs, type 'dir' or 'file'.
+
+        Uses MLSD (RFC 3659) when the server advertises it so entry types
+        come from machine-readable facts; falls back to parsing LIST output
+        on older servers. '.' and '..' are never returned.
+
+        The listing is parsed as bytes block by block while it arrives; only
+        the unfinished last line of a block is held over, never the whole
+        listing, and only entry names are decoded. If given, keep(name,
+        type) filters each entry, so rejected entries are never stored.
+        """
+        entries = []
+
+        def add(name, kind):
+            if name in (b'.', b'..'):
+                return
+            name = name.decode(ftp.encoding, 'replace')
+            if keep is None or keep(name, kind):
+                entries.append((name, kind))
+
+        if ftp.has_feature('MLST'):
+            ftp.select_facts('type;')
+            cmd = 'MLSD'
+
+            def parse(lines):
+                for line in lines.splitlines():
+                    if not line:
+                        continue  # CRLF split across two blocks
+                    facts, _, name = line.partition(b' ')
+                    entry_type = b''
+                    for fact in facts.split(b';'):
+                        key, _, value = fact.partition(b'=')
+                        if key.lower() == b'type':
+                            entry_type = value.lower()
+                            break
+                    if entry_type not in (b'cdir', b'pdir'):
+                        add(name, 'dir' if entry_type == b'dir' else 'file')
+        else:
+            cmd = 'LIST'
+
+            def parse(lines):
+                for line in lines.splitlines():
+                    match = LIST_LINE.fullmatch(line)
+                    if match:
+                        mode, name = match.groups()
+                        add(name, 'dir' if mode == b'd' else 'file')
+
+        carry = bytearray()
+
+        def feed(block):
+            carry.extend(block)
+            # Lines may end in LF, CRLF or a bare CR
+            end = max(carry.rfind(b'\n'), carry.rfind(b'\r')) + 1
+            if end:
+                parse(carry[:end])
+                del carry[:end]
+
+        ftp.retrbinary(cmd, feed)
+        parse(carry)  # Last line, if the listing didn't end with a newline
+        return entries
+
+    def _sweep_directory(self, ftp: MacFTP, path: str,
+                         predicate=None) -> tuple[list[str], list[tuple[str, str]]]:
+        """
+        Delete the plain files in `path` that satisfy `predicate` (all files if None).
+
+        Only matching files are kept from the listing, and all of them are
+        collected before the first DELE: no command can be sent while the
+        listing's data transfer is open. The deletes are then pipelined
+        (MacFTP.delete_many). Directories are skipped. Returns (removed
+        paths, [(path, reply)] for files the server refused to delete).
+        """
+        def is_victim(name, entry_type):
+            return entry_type == 'file' and (predicate is None or predicate(name))
+
+        # Don't overlap the deletes with the listing on a second pooled
+        # connection: Mac FTP servers enumerate a folder by catalog index
+        # (PBGetCatInfo ioFDirIndex), so deleting mid-listing shifts the
+        # indices and silently skips entries.
+        ftp.cwd(path)
+        victims = [name for name, _ in self._list_entries(ftp, is_victim)]
+        deleted, refused = ftp.delete_many(victims)
+        return ([f"{path}{name}" for name in deleted],
+                [(f"{path}{name}", reason) for name, reason in refused])
+
+    @staticmethod
+    def _failure_lines(failed: list[tuple[str, str]]) -> list[str]:
+        """Render refused deletes as response lines ([] if there were none)."""
+        if not failed:
+            return []
+        return ["", f"Failed ({len(failed)}):",
+                *(f"{path}: {reason}" for path, reason in failed)]
+
+    def _listing_lines(self, ftp: MacFTP) -> list[str]:
+        """
+        List the current directory as display lines.
+
+        With MLSD each line is "type size modify name" built from parsed
+        facts; otherwise the server's raw LIST lines are returned.
+        """
+        if ftp.has_feature('MLST'):
+            ftp.select_facts('type;size;modify;')
+            return [
+                f"{facts.get('type', '?'):<4} {facts.get('size', '-'):>10}  "
+                f"{facts.get('modify', '-'):<14}  {name}"
+                for name, facts in ftp.mlsd()
+                if facts.get('type') not in ('cdir', 'pdir')
+            ]
+
+        items = []
+        ftp.retrlines('LIST', items.append)
+        return items
+
     async def list_resources(self) -> list[Resource]:
         """
         List available resources (read-only data).
 
         Resources follow URI scheme: mac://{machine}/{type}/{identifier}
+
+        Like list_tools, the list is built once per loaded config.
         """
         self._reload_if_changed()  # Hot-reload config
+        return self._cached_for_config('resources', self._build_resources)
+
+    def _build_resources(self) -> list[Resource]:
+        """Build the three resources (logs, binary, files) for each machine."""
         resources = []
 
         for machine_id, machine in self.machines.items():
@@ -171,73 +1012,152 @@ class ClassicMacHardwareServer:
         if not uri.startswith("mac://"):
             raise ValueError(f"Invalid URI scheme: {uri}")
 
-        parts = uri[6:].split('/', 2)
-        if len(parts) < 2:
+        machine_id, sep, rest = uri[6:].partition('/')
+        if not sep:
             raise ValueError(f"Invalid URI format: {uri}")
+        resource_type, _, identifier = rest.partition('/')
+
+        machine = self._machine(machine_id)
+        reader = self._resource_readers.get(resource_type)
+        if reader is None:
+            raise ValueError(f"Unknown resource type: {resource_type}")
+
+        def operation(ftp):
+            return reader(ftp, machine, identifier)
+
+        return await asyncio.to_thread(self._ftp_operation, machine_id, operation)
+
+    def _read_logs(self, ftp: MacFTP, machine: dict, identifier: str) -> str:
+        """Read mac://{machine}/logs/{session}: a PT_Log file, or the newest for 'latest'."""
+        log_name = self._find_log(ftp, machine, identifier)
+        if log_name is None:
+            return "No logs found"
+
+        # Download log file into one buffer and decode once. PT_Log
+        # is written by a Classic Mac app: MacRoman text with CR line
+        # endings (binary mode doesn't translate them like ASCII does)
+        buf = io.BytesIO()
+        ftp.retrbinary(f'RETR {log_name}', buf.write, blocksize=FTP_BLOCKSIZE)
+        content = buf.getvalue().decode('mac_roman', errors='replace')
+        return content.replace('\r\n', '\n').replace('\r', '\n')
+
+    def _save_log(self, ftp: MacFTP, machine: dict, identifier: str,
+                  destination: str, head_chars: int = 500) -> Optional[str]:
+        """
+        Stream a PT_Log file straight to `destination`, converted as _read_logs does.
 
-        machine_id = parts[0]
-        resource_type = parts[1]
-        identifier = parts[2] if len(parts) > 2 else ''
+        Each block is decoded and written as it arrives, so the log is never
+        held whole in memory. Blocks go to a temporary file beside
+        `destination` that replaces it only once RETR completes, so a failed
+        transfer leaves no truncated log behind. Returns its first
+        `head_chars` characters, or None if there is no such log.
+        """
+        log_name = self._find_log(ftp, machine, identifier)
+        if log_name is None:
+            return None
+
+        head = []
+        head_len = 0
+        carry = b''  # A trailing CR may be the first half of a CRLF
+        partial = f'{destination}.part'
+        try:
+            with open(partial, 'w') as out:
+                def write(block):
+                    nonlocal carry, head_len
+                    data = carry + block
+                    carry = b'\r' if data.endswith(b'\r') else b''
+                    if carry:
+                        data = data[:-1]
+                    text = data.decode('mac_roman', errors='replace')
+                    text = text.replace('\r\n', '\n').replace('\r', '\n')
+                    out.write(text)
+                    if head_len < head_chars:
+                        head.append(text[:head_chars - head_len])
+                        head_len += len(head[-1])
+
+                ftp.retrbinary(f'RETR {log_name}', write, blocksize=FTP_BLOCKSIZE)
+                if carry:
+                    write(b'\n')  # A lone CR at the very end
+            os.replace(partial, destination)
+        except BaseException:
+            try:
+                os.unlink(partial)
+            except FileNotFoundError:
+                pass
+            raise
+        return ''.join(head)
 
-        ftp = self._connect_ftp(machine_id)
-        machine = self.machines[machine_id]
+    def _find_log(self, ftp: MacFTP, machine: dict, identifier: str) -> Optional[str]:
+        """
+        Change to the logs directory and name the log for `identifier`.
 
-        try:
-            if resource_type == "logs":
-                # Get log file
-                log_path = machine['ftp']['paths']['logs']
-                if identifier == "latest":
-                    # Find most recent log file
-                    files = []
-                    ftp.cwd(log_path)
-                    ftp.retrlines('LIST', files.append)
-                    # Parse and find latest .log file
-                    log_files = [f for f in files if f.endswith('.log')]
-                    if not log_files:
-                        return "No logs found"
-                    # Get the newest one (simple approach: last in list)
-                    latest = log_files[-1].split()[-1]
-                    identifier = latest
-
-                # Download log file
-                lines = []
-                ftp.cwd(log_path)
-                ftp.retrlines(f'RETR {identifier}', lines.append)
-                return '\n'.join(lines)
-
-            elif resource_type == "binary":
-                # Get binary metadata
-                binary_path = machine['ftp']['paths']['binaries']
-                ftp.cwd(binary_path)
-
-                # Check for .version file
-                version_file = f"PeerTalk-{machine['platform']}.version"
+        'latest' picks the newest .log there; None if there is none.
+        """
+        log_path = machine['ftp']['paths']['logs']
+        log_name = identifier
+        ftp.cwd(log_path)
+        if log_name == "latest":
+            if ftp.has_feature('MLST'):
+                # Newest by MLSD modify= fact (YYYYMMDDHHMMSS sorts
+                # as a string), independent of listing order. Only
+                # the two facts needed are sent, and the listing is
+                # reduced in one pass without keeping it
+                ftp.select_facts('type;modify;')
                 try:
-                    lines = []
-                    ftp.retrlines(f'RETR {version_file}', lines.append)
-                    return '\n'.join(lines)
-                except:
-                    return json.dumps({
-                        "error": "No binary deployed",
-                        "platform": machine['platform']
-                    })
-
-            elif resource_type == "files":
-                # List files in directory
-                path = machine['ftp']['paths'].get(identifier, '/')
-                files = []
-                ftp.cwd(path)
-                ftp.retrlines('LIST', files.append)
-                return json.dumps({
-                    "path": path,
-                    "files": files
-                })
-
+                    newest = max(
+                        ((facts.get('modify', ''), name)
+                         for name, facts in ftp.mlsd()
+                         if facts.get('type') == 'file' and name.endswith('.log')),
+                        default=None)
+                except ftplib.error_perm:
+                    newest = None  # Some servers reply 550 for an empty dir
+                if newest is None:
+                    return None
+                log_name = newest[1]
             else:
-                raise ValueError(f"Unknown resource type: {resource_type}")
-
-        finally:
-            ftp.quit()
+                # NLST returns bare names, so no ls -l parsing (and
+                # names with spaces survive)
+                try:
+                    names = ftp.nlst()
+                except ftplib.error_perm:
+                    names = []
+                log_files = [n for n in names if n.endswith('.log')]
+                if not log_files:
+                    return None
+                # No timestamps without MLSD: last in list
+                log_name = log_files[-1]
+        return log_name
+
+    def _read_binary(self, ftp: MacFTP, machine: dict, identifier: str) -> str:
+        """Read mac://{machine}/binary/...: the deployed binary's .version JSON."""
+        # Get binary metadata
+        binary_path = machine['ftp']['paths']['binaries']
+        ftp.cwd(binary_path)
+
+        # Check for .version file (JSON written by deploy_binary in
+        # the connection's encoding; fetched in one buffer, decoded once)
+        version_file = f"PeerTalk-{machine['platform']}.version"
+        try:
+            buf = bytearray()
+            ftp.retrbinary(f'RETR {version_file}', buf.extend)
+            content = buf.decode(ftp.encoding, errors='replace')
+            return content.replace('\r\n', '\n').removesuffix('\n')
+        except ftplib.error_perm:
+            return json.dumps({
+                "error": "No binary deployed",
+                "platform": machine['platform']
+            })
+
+    def _read_files(self, ftp: MacFTP, machine: dict, identifier: str) -> str:
+        """Read mac://{machine}/files/{path key}: a listing of that directory as JSON."""
+        # List files in directory
+        path = machine['ftp']['paths'].get(identifier, '/')
+        ftp.cwd(path)
+        files = self._listing_lines(ftp)
+        return json.dumps({
+            "path": path,
+            "files": files
+        })
 
     async def list_tools(self) -> list[Tool]:
         """
@@ -247,7 +1167,14 @@ class ClassicMacHardwareServer:
 
         Note: Machine enums are not included in schemas to allow hot-reloading.
         Validation happens at execution time instead.
+
+        The list is built once per loaded config: a reload replaces
+        self.machines, which is what the cache is keyed on.
         """
+        return self._cached_for_config('tools', self._build_tools)
+
+    def _build_tools(self) -> list[Tool]:
+        """Build the Tool list, naming the configured machines in descriptions."""
         # Get current machine IDs for descriptions (informational only)
         machine_ids = ', '.join(self.machines.keys()) if self.machines else '(none configured yet)'
 
@@ -411,6 +1338,11 @@ class ClassicMacHardwareServer:
                             "items": {"type": "string"},
                             "description": "Command-line arguments (optional)",
                             "default": []
+                        },
+                        "timeout": {
+                            "type": "number",
+                            "description": "Seconds to wait for the run; pass the remaining budget when part of a longer workflow",
+                            "default": LAUNCHAPPL_TIMEOUT
                         }
                     },
                     "required": ["machine", "platform"]
@@ -424,7 +1356,7 @@ class ClassicMacHardwareServer:
                     "properties": {
                         "machine": {
                             "type": "string",
-                            "description": f"Machine ID (configured machines: {machine_ids})"
+                            "description": f"Machine ID, or 'all' for every machine (configured machines: {machine_ids})"
                         },
                         "scope": {
                             "type": "string",
@@ -502,749 +1434,729 @@ class ClassicMacHardwareServer:
         ]
 
     async def call_tool(self, name: str, arguments: dict) -> list[TextContent]:
-        """Execute tool with side effects."""
+        """
+        Execute tool with side effects.
+
+        Dispatches through self._tool_table. Synchronous handlers do blocking
+        FTP/socket/subprocess work, so they run in a worker thread to keep the
+        event loop serving other requests.
+        """
         self._reload_if_changed()  # Hot-reload config
 
-        if name == "list_machines":
-            machines_info = []
-            for machine_id, machine in self.machines.items():
-                machines_info.append({
-                    "id": machine_id,
-                    "name": machine['name'],
-                    "platform": machine['platform'],
-                    "system": machine['system'],
-                    "cpu": machine['cpu'],
-                    "host": machine['ftp']['host']
-                })
-            return [TextContent(
-                type="text",
-                text=json.dumps(machines_info, indent=2)
-            )]
+        try:
+            handler, is_async = self._tool_table[name]
+        except KeyError:
+            raise ValueError(f"Unknown tool: {name}") from None
 
-        elif name == "reload_config":
-            old_count = len(self.machines)
-            self.machines = self._load_config()
-            self._config_mtime = os.path.getmtime(self.config_path)
-            new_count = len(self.machines)
+        if is_async:
+            return await handler(arguments)
+        return await asyncio.to_thread(handler, arguments)
 
-            return [TextContent(
-                type="text",
-                text=f"✅ Configuration reloaded (forced)\n\n" +
-                     f"Machines: {old_count} → {new_count}\n\n" +
-                     json.dumps(list(self.machines.keys()), indent=2) +
-                     f"\n\nNote: Config is automatically hot-reloaded when machines.json changes."
-            )]
+    async def _tool_list_machines(self, arguments: dict) -> list[TextContent]:
+        """
+        List all configured Classic Mac machines.
+
+        No I/O: the JSON is rendered once per loaded config, so this runs
+        on the event loop rather than in a worker thread.
+        """
+        return [TextContent(
+            type="text",
+            text=self._cached_for_config('machines_json', self._render_machines)
+        )]
+
+    def _render_machines(self) -> str:
+        """Render the list_machines summary of the loaded config as JSON."""
+        machines_info = []
+        for machine_id, machine in self.machines.items():
+            machines_info.append({
+                "id": machine_id,
+                "name": machine['name'],
+                "platform": machine['platform'],
+                "system": machine['system'],
+                "cpu": machine['cpu'],
+                "host": machine['ftp']['host']
+            })
+        return json.dumps(machines_info, indent=2)
+
+    def _tool_reload_config(self, arguments: dict) -> list[TextContent]:
+        """
+        Force a reload of machines.json.
 
-        elif name == "test_connection":
-            machine_id = arguments["machine"]
-            test_launchappl = arguments.get("test_launchappl", True)
-            machine = self.machines[machine_id]
+        The file is always re-read, but the content hash is kept: if it is
+        unchanged the parsed config and pooled FTP connections are reused.
+        """
+        old_count = len(self.machines)
+        self._config_stat = None
+        self._config_stat_checked_at = 0.0  # Bypass the stat TTL
+        self._breaker.clear()
+        self._reload_if_changed()
+        new_count = len(self.machines)
+
+        return [TextContent(
+            type="text",
+            text=f"✅ Configuration reloaded (forced)\n\n"
+                 f"Machines: {old_count} → {new_count}\n\n"
+                 f"{json.dumps(list(self.machines.keys()), indent=2)}\n\n"
+                 f"Note: Config is automatically hot-reloaded when machines.json changes."
+        )]
+
+    async def _tool_test_connection(self, arguments: dict) -> list[TextContent]:
+        """
+        Test FTP and LaunchAPPL connectivity to a Classic Mac.
 
-            results = []
+        The FTP check runs in a worker thread; the LaunchAPPL port probe is
+        a plain asyncio connect, so it needs no thread at all.
+        """
+        machine_id = arguments["machine"]
+        test_launchappl = arguments.get("test_launchappl", True)
+        machine = self._machine(machine_id)
 
-            # Test FTP connection
-            try:
-                ftp = self._connect_ftp(machine_id)
-                ftp.quit()
-                results.append(f"✓ FTP: Connected to {machine['ftp']['host']}:{machine['ftp'].get('port', 21)}")
-            except Exception as e:
-                results.append(f"✗ FTP: Failed - {str(e)}")
-                return [TextContent(type="text", text="\n".join(results))]
+        results = []
+
+        # Test FTP connection (an explicit test bypasses the circuit breaker)
+        self._breaker.pop(machine_id, None)
+        try:
+            # NOOP always reaches the Mac: a pooled connection checked out
+            # moments after its last use is handed over unprobed
+            await asyncio.to_thread(self._ftp_operation, machine_id,
+                                    lambda ftp: ftp.voidcmd('NOOP'))
+            spec = self.specs[machine_id]
+            results.append(f"✓ FTP: Connected to {spec.host}:{spec.port}")
+        except MachineUnreachableError as e:
+            # Retry hit the breaker tripped by the first attempt; report why
+            results.append(f"✗ FTP: Failed - {str(e.__cause__)}")
+            return [TextContent(type="text", text="\n".join(results))]
+        except Exception as e:
+            results.append(f"✗ FTP: Failed - {str(e)}")
+            return [TextContent(type="text", text="\n".join(results))]
 
-            # Test LaunchAPPL connection if requested
-            if test_launchappl and machine.get('launchappl', {}).get('enabled'):
-                import socket
+        # Test LaunchAPPL connection if requested
+        if test_launchappl and machine.get('launchappl', {}).get('enabled'):
+            try:
+                port = machine['launchappl'].get('port', 1984)
                 try:
-                    port = machine['launchappl'].get('port', 1984)
-                    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                    sock.settimeout(2)
-                    result = sock.connect_ex((machine['ftp']['host'], port))
-                    sock.close()
-
-                    if result == 0:
-                        results.append(f"✓ LaunchAPPL: Listening on port {port}")
-                    else:
-                        results.append(f"✗ LaunchAPPL: Not listening on port {port}")
-                except Exception as e:
-                    results.append(f"✗ LaunchAPPL: Test failed - {str(e)}")
+                    _, writer = await asyncio.wait_for(
+                        asyncio.open_connection(self.specs[machine_id].host, port), timeout=2)
+                except (asyncio.TimeoutError, OSError):
+                    results.append(f"✗ LaunchAPPL: Not listening on port {port}")
+                else:
+                    writer.close()
+                    await writer.wait_closed()
+                    results.append(f"✓ LaunchAPPL: Listening on port {port}")
+            except Exception as e:
+                results.append(f"✗ LaunchAPPL: Test failed - {str(e)}")
 
-            return [TextContent(
-                type="text",
-                text=f"Connection test for {machine['name']}:\n\n" + "\n".join(results)
-            )]
+        return [TextContent(
+            type="text",
+            text=f"Connection test for {machine['name']}:\n\n" + "\n".join(results)
+        )]
 
-        elif name == "list_directory":
-            machine_id = arguments["machine"]
-            path = arguments.get("path", "/")
+    def _tool_list_directory(self, arguments: dict) -> list[TextContent]:
+        """List files and directories on a Classic Mac."""
+        machine_id = arguments["machine"]
+        path = arguments.get("path", "/")
 
-            ftp = self._connect_ftp(machine_id)
-            machine = self.machines[machine_id]
+        machine = self._machine(machine_id)
 
-            try:
+        cache_key = (machine_id, path)
+        cached = self._list_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < LISTING_CACHE_TTL:
+            items = cached[1]
+        else:
+            def operation(ftp):
                 ftp.cwd(path)
-                items = []
-                ftp.retrlines('LIST', items.append)
+                return self._listing_lines(ftp)
 
-                return [TextContent(
-                    type="text",
-                    text=f"Directory listing: {machine['name']}:{path}\n\n" + "\n".join(items)
-                )]
-            finally:
-                ftp.quit()
+            items = self._ftp_operation(machine_id, operation)
+            self._list_cache[cache_key] = (time.monotonic(), items)
 
-        elif name == "create_directory":
-            machine_id = arguments["machine"]
-            path = arguments["path"]
+        return [TextContent(
+            type="text",
+            text="\n".join([f"Directory listing: {machine['name']}:{path}", "", *items])
+        )]
 
-            ftp = self._connect_ftp(machine_id)
-            machine = self.machines[machine_id]
+    def _tool_create_directory(self, arguments: dict) -> list[TextContent]:
+        """Create a directory on a Classic Mac."""
+        machine_id = arguments["machine"]
+        path = arguments["path"]
 
-            try:
-                ftp.mkd(path)
-                return [TextContent(
-                    type="text",
-                    text=f"✅ Created directory: {machine['name']}:{path}"
-                )]
-            except Exception as e:
-                return [TextContent(
-                    type="text",
-                    text=f"✗ Failed to create directory: {str(e)}"
-                )]
-            finally:
-                ftp.quit()
+        machine = self._machine(machine_id)
 
-        elif name == "delete_files":
-            machine_id = arguments["machine"]
-            path = arguments["path"]
-            recursive = arguments.get("recursive", False)
+        def operation(ftp):
+            ftp.mkd(path)
+            return [TextContent(
+                type="text",
+                text=f"✅ Created directory: {machine['name']}:{path}"
+            )]
 
-            ftp = self._connect_ftp(machine_id)
-            machine = self.machines[machine_id]
+        try:
+            return self._ftp_operation(machine_id, operation, mutates=True)
+        except Exception as e:
+            return [TextContent(
+                type="text",
+                text=f"✗ Failed to create directory: {str(e)}"
+            )]
 
-            try:
-                deleted = []
+    def _tool_delete_files(self, arguments: dict) -> list[TextContent]:
+        """Delete files or directories on a Classic Mac."""
+        machine_id = arguments["machine"]
+        path = arguments["path"]
+        recursive = arguments.get("recursive", False)
 
-                if recursive:
-                    # Recursively delete directory and contents
-                    def delete_recursive(ftp, dir_path):
-                        try:
-                            # Try to CWD - if it works, it's a directory
-                            original_dir = ftp.pwd()
-                            ftp.cwd(dir_path)
-
-                            # List contents
-                            items = []
-                            ftp.retrlines('LIST', items.append)
-
-                            for item in items:
-                                parts = item.split(None, 8)
-                                if len(parts) < 9:
-                                    continue
-                                name = parts[8]
-                                if name in ['.', '..']:
-                                    continue
-
-                                item_path = name  # Relative to current dir
-
-                                # Check if directory (first char is 'd')
-                                if item.startswith('d'):
-                                    delete_recursive(ftp, item_path)
-                                else:
-                                    try:
-                                        ftp.delete(item_path)
-                                        deleted.append(f"{dir_path}/{name}")
-                                    except:
-                                        pass
-
-                            # Go back and remove the directory
-                            ftp.cwd(original_dir)
-                            try:
-                                ftp.rmd(dir_path)
-                                deleted.append(f"{dir_path}/ (directory)")
-                            except:
-                                pass
-                        except:
-                            # Not a directory, try to delete as file
-                            try:
-                                ftp.delete(dir_path)
-                                deleted.append(dir_path)
-                            except:
-                                pass
+        machine = self._machine(machine_id)
 
-                    delete_recursive(ftp, path)
-                else:
-                    # Delete single file/empty directory
+        def operation(ftp):
+            deleted = []
+            failed = []
+
+            if recursive:
+                # Recursively delete directory and contents
+                def delete_recursive(ftp, dir_path):
                     try:
-                        ftp.delete(path)
-                        deleted.append(path)
-                    except:
+                        # Try to CWD - if it works, it's a directory
+                        original_dir = ftp.pwd()
+                        ftp.cwd(dir_path)
+                    except ftplib.error_perm:
+                        # Not a directory, try to delete as file
                         try:
-                            ftp.rmd(path)
-                            deleted.append(f"{path}/ (directory)")
-                        except Exception as e:
-                            return [TextContent(
-                                type="text",
-                                text=f"✗ Failed to delete {path}: {str(e)}"
-                            )]
-
-                return [TextContent(
-                    type="text",
-                    text=f"✅ Deleted from {machine['name']}:\n\n" + "\n".join(deleted) +
-                         f"\n\nTotal: {len(deleted)} items"
-                )]
-            finally:
-                ftp.quit()
+                            ftp.delete(dir_path)
+                            deleted.append(dir_path)
+                        except ftplib.error_perm as e:
+                            failed.append((dir_path, str(e)))
+                        return
+
+                    # Entry types are known from the listing, so children
+                    # never need a failed DELE/CWD probe. Files go first as
+                    # one pipelined batch, then each subdirectory.
+                    entries = self._list_entries(ftp)
+                    done, refused = ftp.delete_many(
+                        [name for name, entry_type in entries if entry_type == 'file'])
+                    deleted.extend(f"{dir_path}/{name}" for name in done)
+                    failed.extend((f"{dir_path}/{name}", reason) for name, reason in refused)
+                    for name, entry_type in entries:
+                        if entry_type == 'dir':
+                            delete_recursive(ftp, name)
+
+                    # Go back and remove the directory
+                    ftp.cwd(original_dir)
+                    try:
+                        ftp.rmd(dir_path)
+                        deleted.append(f"{dir_path}/ (directory)")
+                    except ftplib.error_perm as e:
+                        failed.append((f"{dir_path}/", str(e)))
 
-        elif name == "deploy_binary":
-            machine_id = arguments["machine"]
-            platform = arguments["platform"]
-            binary_path = arguments["binary_path"]
+                delete_recursive(ftp, path)
+            else:
+                # Delete single file/empty directory
+                try:
+                    ftp.delete(path)
+                    deleted.append(path)
+                except ftplib.error_perm:
+                    try:
+                        ftp.rmd(path)
+                        deleted.append(f"{path}/ (directory)")
+                    except ftplib.error_perm as e:
+                        return [TextContent(
+                            type="text",
+                            text=f"✗ Failed to delete {path}: {str(e)}"
+                        )]
 
-            # Verify binary exists locally
-            if not Path(binary_path).exists():
-                raise FileNotFoundError(f"Binary not found: {binary_path}")
+            return [TextContent(
+                type="text",
+                # One join over every line: long path lists aren't copied
+                # again by + concatenation
+                text="\n".join([
+                    f"✅ Deleted from {machine['name']}:", "",
+                    *deleted,
+                    "", f"Total: {len(deleted)} items",
+                    *self._failure_lines(failed),
+                ])
+            )]
 
-            ftp = self._connect_ftp(machine_id)
-            machine = self.machines[machine_id]
+        return self._ftp_operation(machine_id, operation, mutates=True)
 
-            try:
-                # Upload to binaries directory
-                remote_path = machine['ftp']['paths']['binaries']
-                ftp.cwd(remote_path)
-
-                # Determine base path (remove .bin extension if present)
-                base_path = str(binary_path).replace('.bin', '')
-                binary_name = f"PeerTalk-{platform}"
-
-                # Upload both .dsk and .bin files
-                files_uploaded = []
-
-                # Try to upload .dsk file (disk image with resource fork)
-                dsk_path = f"{base_path}.dsk"
-                if Path(dsk_path).exists():
-                    with open(dsk_path, 'rb') as f:
-                        ftp.storbinary(f'STOR {binary_name}.dsk', f)
-                    files_uploaded.append(f"{binary_name}.dsk ({Path(dsk_path).stat().st_size} bytes)")
-
-                # Upload .bin file (for BinUnpk or LaunchAPPL)
-                bin_path = f"{base_path}.bin" if not binary_path.endswith('.bin') else binary_path
-                if Path(bin_path).exists():
-                    with open(bin_path, 'rb') as f:
-                        ftp.storbinary(f'STOR {binary_name}.bin', f)
-                    files_uploaded.append(f"{binary_name}.bin ({Path(bin_path).stat().st_size} bytes)")
-                elif Path(binary_path).exists():
-                    # Fallback: upload whatever binary_path points to
-                    with open(binary_path, 'rb') as f:
-                        ftp.storbinary(f'STOR {binary_name}', f)
-                    files_uploaded.append(f"{binary_name} ({Path(binary_path).stat().st_size} bytes)")
-
-                # Create version file
-                version_info = {
-                    "platform": platform,
-                    "uploaded": datetime.now().isoformat(),
-                    "source": binary_path,
-                    "files": files_uploaded
-                }
-                version_data = json.dumps(version_info, indent=2)
-                ftp.storlines(f'STOR {binary_name}.version',
-                             iter(version_data.split('\n')))
+    def _tool_deploy_binary(self, arguments: dict) -> list[TextContent]:
+        """Deploy a compiled binary (.dsk/.bin) to a Classic Mac."""
+        machine_id = arguments["machine"]
+        platform = arguments["platform"]
+        binary_path = arguments["binary_path"]
 
-                return [TextContent(
-                    type="text",
-                    text=f"✅ Deployed to {machine['name']} ({machine_id})\n\nFiles:\n" + "\n".join(f"  - {f}" for f in files_uploaded) + f"\n\n{version_data}"
-                )]
+        # One scan of the build directory answers every existence check below
+        directory, filename = os.path.split(binary_path)
+        try:
+            present = {entry.name for entry in os.scandir(directory or '.')}
+        except OSError:
+            present = set()
 
-            finally:
-                ftp.quit()
+        # Verify binary exists locally
+        if filename not in present:
+            raise FileNotFoundError(f"Binary not found: {binary_path}")
 
-        elif name == "fetch_logs":
-            machine_id = arguments["machine"]
-            session_id = arguments.get("session_id", "latest")
-            destination = arguments.get("destination")
+        machine = self._machine(machine_id)
 
-            # Use read_resource to get logs
-            uri = f"mac://{machine_id}/logs/{session_id}"
-            log_content = await self.read_resource(uri)
+        # Work out the uploads once, before connecting (and not again on retry)
+        stem = filename.removesuffix('.bin')
+        binary_name = f"PeerTalk-{platform}"
+        uploads = []  # (local path, remote name)
 
-            # Save to destination if specified
-            if destination:
-                Path(destination).parent.mkdir(parents=True, exist_ok=True)
-                Path(destination).write_text(log_content)
-                return [TextContent(
-                    type="text",
-                    text=f"Saved logs to {destination}\n\n{log_content[:500]}..."
-                )]
-            else:
-                return [TextContent(
-                    type="text",
-                    text=log_content
-                )]
+        # .dsk file (disk image with resource fork)
+        if f"{stem}.dsk" in present:
+            uploads.append((os.path.join(directory, f"{stem}.dsk"), f"{binary_name}.dsk"))
 
-        elif name == "execute_binary":
-            # Execute binary on Classic Mac using LaunchAPPL over TCP
-            import subprocess
+        # .bin file (for BinUnpk or LaunchAPPL)
+        if f"{stem}.bin" in present:
+            uploads.append((os.path.join(directory, f"{stem}.bin"), f"{binary_name}.bin"))
+        else:
+            # Fallback: upload whatever binary_path points to (checked above)
+            uploads.append((binary_path, binary_name))
+
+        def operation(ftp):
+            # Upload to binaries directory
+            remote_path = machine['ftp']['paths']['binaries']
+            ftp.cwd(remote_path)
+
+            # Back-to-back on the pooled connection; sendfile() streams each
+            # file from the page cache
+            files_uploaded = []
+            for local_path, remote_name in uploads:
+                with open(local_path, 'rb') as f:
+                    size = os.fstat(f.fileno()).st_size
+                    ftp.storfile(f'STOR {remote_name}', f)
+                files_uploaded.append(f"{remote_name} ({size} bytes)")
+
+            # Create version file
+            version_info = {
+                "platform": platform,
+                "uploaded": datetime.now().isoformat(),
+                "source": binary_path,
+                "files": files_uploaded
+            }
+            version_data = json.dumps(version_info, indent=2)
+            # One binary STOR of the encoded JSON (read back by
+            # mac://{machine}/binary in the same encoding)
+            ftp.storbinary(f'STOR {binary_name}.version',
+                           io.BytesIO(version_data.encode(ftp.encoding)))
 
-            machine_id = arguments["machine"]
-            platform = arguments["platform"]
-            binary_path = arguments.get("binary_path", "")
-            args = arguments.get("args", [])
+            return [TextContent(
+                type="text",
+                text="\n".join([
+                    f"✅ Deployed to {machine['name']} ({machine_id})", "", "Files:",
+                    *(f"  - {name}" for name in files_uploaded),
+                    "", version_data,
+                ])
+            )]
 
-            self._validate_machine_id(machine_id)
-            machine = self.machines[machine_id]
-            machine_ip = machine['ftp']['host']
+        return self._ftp_operation(machine_id, operation, mutates=True)
+
+    async def _tool_fetch_logs(self, arguments: dict) -> list[TextContent]:
+        """Download PT_Log output from a Classic Mac."""
+        machine_id = arguments["machine"]
+        session_id = arguments.get("session_id", "latest")
+        destination = arguments.get("destination")
+
+        # Save to destination if specified: streamed to disk, only the
+        # head of the log is kept for the reply
+        if destination:
+            machine = self._machine(machine_id)
+            Path(destination).parent.mkdir(parents=True, exist_ok=True)
+            head = await asyncio.to_thread(
+                self._ftp_operation, machine_id,
+                lambda ftp: self._save_log(ftp, machine, session_id, destination))
+            if head is None:
+                return [TextContent(type="text", text="No logs found")]
+            return [TextContent(
+                type="text",
+                text=f"Saved logs to {destination}\n\n{head}..."
+            )]
+        else:
+            # Use read_resource to get logs
+            log_content = await self.read_resource(f"mac://{machine_id}/logs/{session_id}")
+            return [TextContent(
+                type="text",
+                text=log_content
+            )]
 
-            # Path to LaunchAPPL client
-            launchappl = "/opt/Retro68-build/toolchain/bin/LaunchAPPL"
+    async def _tool_execute_binary(self, arguments: dict) -> list[TextContent]:
+        """
+        Run a binary on a Classic Mac via LaunchAPPL over TCP.
 
-            if not os.path.exists(launchappl):
+        LaunchAPPL runs as an asyncio subprocess, so a long launch neither
+        blocks the event loop nor ties up a worker thread, and launches on
+        different Macs overlap.
+        """
+        machine_id = arguments["machine"]
+        platform = arguments["platform"]
+        binary_path = arguments.get("binary_path", "")
+        args = arguments.get("args", [])
+        timeout = float(arguments.get("timeout", LAUNCHAPPL_TIMEOUT))
+
+        machine = self._machine(machine_id)
+        machine_ip = self.specs[machine_id].host
+
+        # LaunchAPPL client: checked until first found, then trusted
+        if not self._launchappl_found:
+            if not os.path.exists(LAUNCHAPPL):
                 return [TextContent(
                     type="text",
-                    text=f"❌ LaunchAPPL client not found at {launchappl}"
+                    text=f"❌ LaunchAPPL client not found at {LAUNCHAPPL}"
                 )]
+            self._launchappl_found = True
 
-            # Verify binary exists (supports both absolute and relative paths)
-            if not binary_path or not Path(binary_path).exists():
-                return [TextContent(
-                    type="text",
-                    text=f"❌ Binary not found: {binary_path}\n\n"
-                         f"Provide binary_path argument with:\n"
-                         f"  - Absolute path: /workspace/build/mactcp/PeerTalk.bin\n"
-                         f"  - Relative path: LaunchAPPL-build/Dialog.bin\n"
-                         f"  - Relative path: build/ppc/PeerTalk.bin"
-                )]
+        # Verify binary exists (supports both absolute and relative paths)
+        try:
+            st = os.stat(binary_path) if binary_path else None
+        except OSError:
+            st = None
+        if st is None:
+            return [TextContent(
+                type="text",
+                text=f"❌ Binary not found: {binary_path}\n\n"
+                     f"Provide binary_path argument with:\n"
+                     f"  - Absolute path: /workspace/build/mactcp/PeerTalk.bin\n"
+                     f"  - Relative path: LaunchAPPL-build/Dialog.bin\n"
+                     f"  - Relative path: build/ppc/PeerTalk.bin"
+            )]
 
-            # Resolve to absolute path for subprocess
-            binary_path = str(Path(binary_path).resolve())
+        # Resolve to absolute path for subprocess (absolute paths are usable
+        # as given; LaunchAPPL follows any symlinks itself)
+        if not os.path.isabs(binary_path):
+            binary_path = self._resolve_local(binary_path, st.st_mtime_ns)
 
-            # Run LaunchAPPL with TCP backend
-            try:
-                cmd = [launchappl, "-e", "tcp", "--tcp-address", machine_ip, binary_path]
-                if args:
-                    cmd.extend(args)
-
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=60
-                )
+        if timeout <= 0:
+            return [TextContent(
+                type="text",
+                text=f"⏱️ Not launched on {machine['name']}: no time left (timeout={timeout:g}s)."
+            )]
 
-                if result.returncode == 0:
-                    return [TextContent(
-                        type="text",
-                        text=f"✅ Executed on {machine['name']}:\n\n{result.stdout}"
-                    )]
-                else:
-                    return [TextContent(
-                        type="text",
-                        text=f"⚠️ Execution failed on {machine['name']}:\n\n"
-                             f"Error: {result.stderr}\n\n"
-                             f"Make sure LaunchAPPLServer is running on {machine['name']} with TCP enabled."
-                    )]
-            except subprocess.TimeoutExpired:
+        # Run LaunchAPPL with TCP backend
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                LAUNCHAPPL, "-e", "tcp", "--tcp-address", machine_ip, binary_path, *args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+            except BaseException:
+                # Timed out, or the request was cancelled by the client:
+                # don't leave LaunchAPPL running (or a zombie) behind
+                if proc.returncode is None:
+                    proc.kill()
+                    await asyncio.shield(proc.wait())
+                raise
+
+            if proc.returncode == 0:
                 return [TextContent(
                     type="text",
-                    text=f"⏱️ Execution timed out after 60 seconds.\n\n"
-                         f"The binary may still be running on {machine['name']}.\n"
-                         f"Use /fetch-logs {machine_id} to check results."
+                    text=f"✅ Executed on {machine['name']}:\n\n{stdout.decode(errors='replace')}"
                 )]
-            except Exception as e:
+            else:
                 return [TextContent(
                     type="text",
-                    text=f"❌ Error executing binary: {str(e)}"
+                    text=f"⚠️ Execution failed on {machine['name']}:\n\n"
+                         f"Error: {stderr.decode(errors='replace')}\n\n"
+                         f"Make sure LaunchAPPLServer is running on {machine['name']} with TCP enabled."
                 )]
+        except asyncio.TimeoutError:
+            return [TextContent(
+                type="text",
+                text=f"⏱️ Execution timed out after {timeout:g} seconds.\n\n"
+                     f"The binary may still be running on {machine['name']}.\n"
+                     f"Use /fetch-logs {machine_id} to check results."
+            )]
+        except FileNotFoundError:
+            self._launchappl_found = False  # Removed since it was found
+            return [TextContent(
+                type="text",
+                text=f"❌ LaunchAPPL client not found at {LAUNCHAPPL}"
+            )]
+        except Exception as e:
+            return [TextContent(
+                type="text",
+                text=f"❌ Error executing binary: {str(e)}"
+            )]
 
-        elif name == "cleanup_machine":
-            machine_id = arguments["machine"]
-            scope = arguments.get("scope", "old_files")
-            specific_path = arguments.get("specific_path", "/")
-            keep_latest = arguments.get("keep_latest", True)
-
-            ftp = self._connect_ftp(machine_id)
-            machine = self.machines[machine_id]
-
-            try:
-                removed = []
+    async def _fanout(self, machine_ids: list[str], fn, *args) -> list[TextContent]:
+        """
+        Run fn(machine_id, *args) for several machines concurrently.
 
-                if scope == "old_files":
-                    # Clean .old files from binaries and logs directories
-                    for path_key in ['binaries', 'logs']:
-                        if path_key in machine['ftp']['paths']:
-                            try:
-                                path = machine['ftp']['paths'][path_key]
-                                ftp.cwd(path)
-                                files = []
-                                ftp.retrlines('LIST', files.append)
-
-                                for file_line in files:
-                                    filename = file_line.split()[-1]
-                                    if filename.endswith('.old') or filename.endswith('.bak'):
-                                        ftp.delete(filename)
-                                        removed.append(f"{path}{filename}")
-                            except:
-                                pass
+        Each call runs in its own worker thread and borrows from its own
+        machine's connection pool, so wall-clock time is that of the slowest
+        machine rather than the sum. Results are returned in machine_ids
+        order; a failure on one machine is reported inline without
+        cancelling the others.
+        """
+        results = await asyncio.gather(
+            *(asyncio.to_thread(fn, machine_id, *args) for machine_id in machine_ids),
+            return_exceptions=True
+        )
+        contents = []
+        for machine_id, result in zip(machine_ids, results):
+            if isinstance(result, Exception):
+                contents.append(TextContent(type="text", text=f"✗ {machine_id}: {result}"))
+            else:
+                contents.extend(result)
+        return contents
+
+    async def _tool_cleanup_machine(self, arguments: dict) -> list[TextContent]:
+        """Clean files and directories on a Classic Mac, or on all of them."""
+        machine_id = arguments["machine"]
+        if machine_id == "all" and "all" not in self.machines:
+            return await self._fanout(list(self.machines), self._cleanup_one, arguments)
+        return await asyncio.to_thread(self._cleanup_one, machine_id, arguments)
+
+    def _cleanup_one(self, machine_id: str, arguments: dict) -> list[TextContent]:
+        """Clean files and directories on one Classic Mac."""
+        scope = arguments.get("scope", "old_files")
+        specific_path = arguments.get("specific_path", "/")
+        keep_latest = arguments.get("keep_latest", True)
+
+        machine = self._machine(machine_id)
+
+        def operation(ftp):
+            removed = []
+            failed = []
+
+            def sweep(path, predicate=None):
+                done, refused = self._sweep_directory(ftp, path, predicate)
+                removed.extend(done)
+                failed.extend(refused)
+
+            if scope == "old_files":
+                # Clean stale .old/.bak/.tmp files from binaries and logs directories
+                for path_key in ['binaries', 'logs']:
+                    if path_key in machine['ftp']['paths']:
+                        try:
+                            sweep(machine['ftp']['paths'][path_key],
+                                  lambda name: name.endswith(CLEANUP_SUFFIXES))
+                        except ftplib.error_perm:
+                            pass  # Directory missing on this Mac: nothing to clean
+
+            elif scope == "binaries":
+                # Clean entire binaries directory
+                binary_path = machine['ftp']['paths'].get('binaries', '/Applications/PeerTalk/')
+                try:
+                    sweep(binary_path)
+                except ftplib.error_perm:
+                    pass  # Directory missing on this Mac: nothing to clean
 
-                elif scope == "binaries":
-                    # Clean entire binaries directory
-                    binary_path = machine['ftp']['paths'].get('binaries', '/Applications/PeerTalk/')
-                    try:
-                        ftp.cwd(binary_path)
-                        files = []
-                        ftp.retrlines('LIST', files.append)
-
-                        for file_line in files:
-                            filename = file_line.split()[-1]
-                            if filename not in ['.', '..']:
-                                try:
-                                    ftp.delete(filename)
-                                    removed.append(f"{binary_path}{filename}")
-                                except:
-                                    pass
-                    except:
-                        pass
-
-                elif scope == "logs":
-                    # Clean logs directory
-                    logs_path = machine['ftp']['paths'].get('logs', '/Documents/PeerTalk-Logs/')
+            elif scope == "logs":
+                # Clean logs directory
+                logs_path = machine['ftp']['paths'].get('logs', '/Documents/PeerTalk-Logs/')
+                try:
+                    sweep(logs_path)
+                except ftplib.error_perm:
+                    pass  # Directory missing on this Mac: nothing to clean
+
+            elif scope == "all":
+                # Clean everything under the FTP root, breadth first. Each
+                # folder costs one CWD by absolute path (no PWD or CWD back
+                # out), one listing and one pipelined DELE batch for its
+                # files; folders are removed deepest first once emptied
+                pending = collections.deque(['/'])
+                folders = []
+                while pending:
+                    dir_path = pending.popleft()
+                    prefix = dir_path.rstrip('/') + '/'
                     try:
-                        ftp.cwd(logs_path)
-                        files = []
-                        ftp.retrlines('LIST', files.append)
-
-                        for file_line in files:
-                            filename = file_line.split()[-1]
-                            if filename not in ['.', '..']:
-                                try:
-                                    ftp.delete(filename)
-                                    removed.append(f"{logs_path}{filename}")
-                                except:
-                                    pass
-                    except:
-                        pass
-
-                elif scope == "all":
-                    # Clean everything (FTP root)
-                    ftp.cwd('/')
-                    items = []
-                    ftp.retrlines('LIST', items.append)
-
-                    def delete_recursive(ftp, dir_path, from_root=False):
-                        try:
-                            original_dir = ftp.pwd()
-                            ftp.cwd(dir_path)
-
-                            items = []
-                            ftp.retrlines('LIST', items.append)
-
-                            for item in items:
-                                parts = item.split(None, 8)
-                                if len(parts) < 9:
-                                    continue
-                                name = parts[8]
-                                if name in ['.', '..']:
-                                    continue
-
-                                if item.startswith('d'):
-                                    delete_recursive(ftp, name)
-                                else:
-                                    try:
-                                        ftp.delete(name)
-                                        removed.append(f"{dir_path}/{name}")
-                                    except:
-                                        pass
-
-                            ftp.cwd(original_dir)
-                            if not from_root:
-                                try:
-                                    ftp.rmd(dir_path)
-                                    removed.append(f"{dir_path}/ (directory)")
-                                except:
-                                    pass
-                        except:
-                            pass
-
-                    for item in items:
-                        parts = item.split(None, 8)
-                        if len(parts) < 9:
-                            continue
-                        name = parts[8]
-                        if name in ['.', '..']:
+                        ftp.cwd(dir_path)
+                    except ftplib.error_perm as e:
+                        failed.append((prefix, str(e)))
+                        continue
+                    # '.' and '..' are dropped while parsing the listing,
+                    # before any command is sent for them
+                    entries = self._list_entries(ftp)
+                    done, refused = ftp.delete_many(
+                        [name for name, entry_type in entries if entry_type == 'file'])
+                    removed.extend(prefix + name for name in done)
+                    failed.extend((prefix + name, reason) for name, reason in refused)
+                    for name, entry_type in entries:
+                        if entry_type != 'dir':
                             continue
-
-                        if item.startswith('d'):
-                            delete_recursive(ftp, name, from_root=True)
+                        # Servers with a recursive SITE RMDIR (e.g. ProFTPD's
+                        # mod_site_misc) remove a whole top-level tree in one
+                        # command; a refusal falls back to walking it
+                        if dir_path == '/' and ftp.has_site_command('RMDIR'):
                             try:
-                                ftp.rmd(name)
-                                removed.append(f"/{name}/ (directory)")
-                            except:
-                                pass
-                        else:
-                            try:
-                                ftp.delete(name)
-                                removed.append(f"/{name}")
-                            except:
+                                ftp.sendcmd(f'SITE RMDIR {prefix + name}')
+                                removed.append(f"{prefix + name}/ (directory tree)")
+                                continue
+                            except ftplib.error_perm:
                                 pass
+                        pending.append(prefix + name)
+                        folders.append(prefix + name)
 
-                elif scope == "specific_path":
-                    # Clean specific path
+                for dir_path in reversed(folders):
                     try:
-                        ftp.cwd(specific_path)
-                        files = []
-                        ftp.retrlines('LIST', files.append)
+                        ftp.rmd(dir_path)
+                        removed.append(f"{dir_path}/ (directory)")
+                    except ftplib.error_perm as e:
+                        failed.append((f"{dir_path}/", str(e)))
 
-                        for file_line in files:
-                            parts = file_line.split(None, 8)
-                            if len(parts) < 9:
-                                continue
-                            filename = parts[8]
-                            if filename not in ['.', '..']:
-                                if file_line.startswith('d'):
-                                    # Directory - skip for now
-                                    pass
-                                else:
-                                    try:
-                                        ftp.delete(filename)
-                                        removed.append(f"{specific_path}{filename}")
-                                    except:
-                                        pass
-                    except Exception as e:
-                        return [TextContent(
-                            type="text",
-                            text=f"✗ Failed to clean {specific_path}: {str(e)}"
-                        )]
+            elif scope == "specific_path":
+                # Clean files in a specific path (subdirectories are left alone)
+                try:
+                    sweep(specific_path)
+                except Exception as e:
+                    return [TextContent(
+                        type="text",
+                        text=f"✗ Failed to clean {specific_path}: {str(e)}"
+                    )]
 
-                return [TextContent(
-                    type="text",
-                    text=f"✅ Cleaned {machine['name']} (scope: {scope}):\n\n" +
-                         ('\n'.join(removed) if removed else "No files to remove") +
-                         f"\n\nTotal: {len(removed)} items"
-                )]
+            return [TextContent(
+                type="text",
+                text="\n".join([
+                    f"✅ Cleaned {machine['name']} (scope: {scope}):", "",
+                    *(removed or ["No files to remove"]),
+                    "", f"Total: {len(removed)} items",
+                    *self._failure_lines(failed),
+                ])
+            )]
 
-            finally:
-                ftp.quit()
+        return self._ftp_operation(machine_id, operation, mutates=True)
 
-        elif name == "upload_file":
-            machine_id = arguments["machine"]
-            local_path = arguments["local_path"]
-            remote_path = arguments["remote_path"]
+    def _tool_upload_file(self, arguments: dict) -> list[TextContent]:
+        """Upload any file to a Classic Mac."""
+        machine_id = arguments["machine"]
+        local_path = arguments["local_path"]
+        remote_path = arguments["remote_path"]
 
-            # Verify local file exists
-            if not Path(local_path).exists():
-                raise FileNotFoundError(f"Local file not found: {local_path}")
+        # Verify local file exists (one stat gives existence and size)
+        try:
+            file_size = os.stat(local_path).st_size
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Local file not found: {local_path}") from None
 
-            ftp = self._connect_ftp(machine_id)
-            machine = self.machines[machine_id]
+        machine = self._machine(machine_id)
 
-            try:
-                # Parse remote path to get directory and filename
-                # Mac path format: "Documents:TestData:file.txt"
-                path_parts = remote_path.split(':')
-                filename = path_parts[-1]
-                directory = ':'.join(path_parts[:-1]) if len(path_parts) > 1 else ''
-
-                # Navigate to directory if specified
-                if directory:
-                    ftp.cwd(directory)
-
-                # Upload file
-                file_size = Path(local_path).stat().st_size
-                with open(local_path, 'rb') as f:
-                    ftp.storbinary(f'STOR {filename}', f)
+        def operation(ftp):
+            # Mac path format: "Documents:TestData:file.txt"
+            directory, filename = self._split_path(remote_path)
 
-                return [TextContent(
-                    type="text",
-                    text=f"✅ Uploaded to {machine['name']}:\n\n"
-                         f"Local:  {local_path}\n"
-                         f"Remote: {remote_path}\n"
-                         f"Size:   {file_size:,} bytes"
-                )]
-            finally:
-                ftp.quit()
+            # Navigate to directory if specified
+            if directory:
+                ftp.cwd(directory)
 
-        elif name == "download_file":
-            machine_id = arguments["machine"]
-            remote_path = arguments["remote_path"]
-            local_path = arguments.get("local_path")
+            # Upload file
+            with open(local_path, 'rb') as f:
+                ftp.storfile(f'STOR {filename}', f)
 
-            # Parse remote path to get filename
-            path_parts = remote_path.split(':')
-            filename = path_parts[-1]
-            directory = ':'.join(path_parts[:-1]) if len(path_parts) > 1 else ''
+            return [TextContent(
+                type="text",
+                text=f"✅ Uploaded to {machine['name']}:\n\n"
+                     f"Local:  {local_path}\n"
+                     f"Remote: {remote_path}\n"
+                     f"Size:   {file_size:,} bytes"
+            )]
 
-            # Determine local destination
-            if not local_path:
-                download_dir = Path(f"downloads/{machine_id}")
-                download_dir.mkdir(parents=True, exist_ok=True)
-                local_path = download_dir / filename
+        return self._ftp_operation(machine_id, operation, mutates=True)
 
-            ftp = self._connect_ftp(machine_id)
-            machine = self.machines[machine_id]
+    def _tool_download_file(self, arguments: dict) -> list[TextContent]:
+        """Download any file from a Classic Mac."""
+        machine_id = arguments["machine"]
+        remote_path = arguments["remote_path"]
+        local_path = arguments.get("local_path")
 
-            try:
-                # Navigate to directory if specified
-                if directory:
-                    ftp.cwd(directory)
+        # Parse remote path to get directory and filename
+        directory, filename = self._split_path(remote_path)
 
-                # Download file
-                with open(local_path, 'wb') as f:
-                    ftp.retrbinary(f'RETR {filename}', f.write)
+        # Determine local destination
+        if not local_path:
+            download_dir = Path(f"downloads/{machine_id}")
+            download_dir.mkdir(parents=True, exist_ok=True)
+            local_path = download_dir / filename
 
-                file_size = Path(local_path).stat().st_size
+        machine = self._machine(machine_id)
 
-                return [TextContent(
-                    type="text",
-                    text=f"✅ Downloaded from {machine['name']}:\n\n"
-                         f"Remote: {remote_path}\n"
-                         f"Local:  {local_path}\n"
-                         f"Size:   {file_size:,} bytes"
-                )]
-            finally:
-                ftp.quit()
+        def operation(ftp):
+            # Navigate to directory if specified
+            if directory:
+                ftp.cwd(directory)
 
-        else:
-            raise ValueError(f"Unknown tool: {name}")
+            # Pre-flight: skip the transfer if the local copy already has
+            # the remote size and modification time (stamped by a previous
+            # download below)
+            ftp.voidcmd('TYPE I')  # SIZE reports bytes only in binary mode
+            try:
+                remote_size = ftp.size(filename)
+            except ftplib.error_perm:
+                remote_size = None
+            remote_mtime = ftp.mdtm(filename) if remote_size is not None else None
 
-    async def list_prompts(self) -> list:
-        """List available prompt templates."""
-        return [
-            {
-                "name": "deploy-and-test",
-                "description": "Deploy binary to Classic Mac, run tests, fetch logs",
-                "arguments": [
-                    {
-                        "name": "machine",
-                        "description": "Machine to deploy to",
-                        "required": True
-                    },
-                    {
-                        "name": "platform",
-                        "description": "Platform: mactcp, opentransport, appletalk",
-                        "required": True
-                    },
-                    {
-                        "name": "test_name",
-                        "description": "Test to run (e.g., tcp-connect)",
-                        "required": True
-                    }
-                ]
-            },
-            {
-                "name": "compare-platforms",
-                "description": "Deploy to all machines, run same test, compare logs",
-                "arguments": [
-                    {
-                        "name": "test_name",
-                        "description": "Test to run on all platforms",
-                        "required": True
-                    }
-                ]
-            },
-            {
-                "name": "debug-crash",
-                "description": "Fetch crash logs and correlate with source code",
-                "arguments": [
-                    {
-                        "name": "machine",
-                        "description": "Machine that crashed",
-                        "required": True
-                    }
-                ]
-            }
-        ]
+            if remote_mtime is not None:
+                try:
+                    st = os.stat(local_path)
+                except FileNotFoundError:
+                    st = None
+                if st and st.st_size == remote_size and int(st.st_mtime) == int(remote_mtime):
+                    return [TextContent(
+                        type="text",
+                        text=f"✅ Already up to date from {machine['name']}:\n\n"
+                             f"Remote: {remote_path}\n"
+                             f"Local:  {local_path}\n"
+                             f"Size:   {remote_size:,} bytes"
+                    )]
 
-    async def get_prompt(self, name: str, arguments: dict) -> dict:
-        """Get prompt template with arguments filled in."""
-        if name == "deploy-and-test":
-            machine = arguments["machine"]
-            platform = arguments["platform"]
-            test_name = arguments["test_name"]
-
-            return {
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": {
-                            "type": "text",
-                            "text": f"""Deploy and test PeerTalk on {machine}:
+            # Download file, counting bytes instead of stat()ing afterwards
+            with open(local_path, 'wb') as f:
+                if remote_size and hasattr(os, 'posix_fallocate'):
+                    try:
+                        os.posix_fallocate(f.fileno(), 0, remote_size)
+                    except OSError:
+                        pass  # Filesystem without fallocate support
 
-1. Deploy binary:
-   /deploy {machine} {platform}
+                file_size = ftp.retrfile(f'RETR {filename}', f)
+                f.truncate()  # Server sent less than SIZE promised
 
-2. Run test:
-   Test: {test_name}
+            if remote_mtime is not None:
+                os.utime(local_path, (remote_mtime, remote_mtime))
 
-3. Fetch logs:
-   /fetch-logs {machine}
+            return [TextContent(
+                type="text",
+                text=f"✅ Downloaded from {machine['name']}:\n\n"
+                     f"Remote: {remote_path}\n"
+                     f"Local:  {local_path}\n"
+                     f"Size:   {file_size:,} bytes"
+            )]
 
-4. Analyze results and report any errors
-"""
-                        }
-                    }
-                ]
-            }
+        return self._ftp_operation(machine_id, operation)
+
+    async def list_prompts(self) -> list:
+        """List available prompt templates."""
+        return PROMPTS
 
-        elif name == "compare-platforms":
-            test_name = arguments["test_name"]
+    async def get_prompt(self, name: str, arguments: Optional[dict]) -> dict:
+        """Get prompt template with arguments filled in."""
+        try:
+            template = PROMPT_TEMPLATES[name]
+        except KeyError:
+            raise ValueError(f"Unknown prompt: {name}") from None
 
-            machines_list = '\n'.join([
+        machines_list = ''
+        if name == "compare-platforms":
+            machines_list = self._cached_for_config('machines_list', lambda: '\n'.join([
                 f"   - {mid}: {m['name']} ({m['platform']})"
                 for mid, m in self.machines.items()
-            ])
-
-            return {
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": {
-                            "type": "text",
-                            "text": f"""Compare test results across all platforms:
-
-Test: {test_name}
-
-Machines:
-{machines_list}
-
-For each machine:
-1. Deploy appropriate binary
-2. Run test: {test_name}
-3. Fetch logs
-4. Compare results
-
-Report differences in behavior, errors, or performance.
-"""
-                        }
-                    }
-                ]
-            }
-
-        elif name == "debug-crash":
-            machine = arguments["machine"]
+            ]))
 
-            return {
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": {
-                            "type": "text",
-                            "text": f"""Debug crash on {machine}:
-
-1. Fetch latest logs from {machine}
-2. Identify crash location (last successful operation)
-3. Read corresponding source file
-4. Check for common Classic Mac pitfalls:
-   - ISR safety violations
-   - Byte ordering issues
-   - Alignment problems
-   - Memory allocation in callbacks
-5. Suggest fix with line numbers
-"""
-                        }
+        # MCP allows arguments=None; machines_list is always the server's
+        # own, whatever the client sent
+        try:
+            text = template.format(**{**(arguments or {}), "machines_list": machines_list})
+        except KeyError as e:
+            raise ValueError(f"Prompt {name} requires argument: {e.args[0]}") from None
+
+        return {
+            "messages": [
+                {
+                    "role": "user",
+                    "content": {
+                        "type": "text",
+                        "text": text
                     }
-                ]
-            }
-
-        else:
-            raise ValueError(f"Unknown prompt: {name}")
+                }
+            ]
+        }
 
 
 async def main():
@@ -1256,13 +2168,30 @@ async def main():
 
     server_instance = ClassicMacHardwareServer(config_path)
 
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        await server_instance.server.run(
-            read_stream,
-            write_stream,
-            server_instance.server.create_initialization_options()
-        )
+    # asyncio.to_thread's default executor is sized from the CPU count
+    # (cpu + 4), which in a 1-2 CPU container would queue fan-out across
+    # machines behind a handful of threads that mostly wait on the network
+    asyncio.get_running_loop().set_default_executor(
+        concurrent.futures.ThreadPoolExecutor(
+            max_workers=FTP_WORKER_THREADS, thread_name_prefix="mac-ftp"))
+
+    try:
+        async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+            await server_instance.server.run(
+                read_stream,
+                write_stream,
+                server_instance.server.create_initialization_options()
+            )
+    finally:
+        server_instance._ftp_pool.close_all(wait=True)  # QUIT pooled sessions politely
 
 
 if __name__ == "__main__":
+    # stdout carries the MCP protocol; diagnostics go to stderr
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr, format='%(message)s')
+    try:
+        import uvloop  # Optional: faster event loop for the stdio/subprocess I/O
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Regression tests for the Classic Mac Hardware MCP server's FTP parsing
+and remote path handling.
+
+Run from this directory: python3 -m unittest test_server
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+import server
+
+
+class FakeListingFTP:
+    """Just enough of MacFTP for _list_entries: replays a canned LIST reply."""
+
+    encoding = 'latin-1'
+
+    def __init__(self, listing: bytes, blocksize: int):
+        self.listing = listing
+        self.blocksize = blocksize
+
+    def has_feature(self, name: str) -> bool:
+        return False  # No MLST: forces the LIST parser
+
+    def retrbinary(self, cmd, callback):
+        for i in range(0, len(self.listing), self.blocksize):
+            callback(self.listing[i:i + self.blocksize])
+
+
+class ListEntriesTest(unittest.TestCase):
+    LINES = [
+        b'total 3',
+        b'drwxr-xr-x 1 owner group 0 Jan 01 2024 Applications',
+        b'-rw-r--r-- 1 owner group 1234 Jan 01 12:00 Read Me',
+        b'-rw-r--r-- 1 owner group 99 Jan 01 12:00 Caf\x8e',
+    ]
+    EXPECTED = [
+        ('Applications', 'dir'),
+        ('Read Me', 'file'),
+        ('Caf\x8e', 'file'),
+    ]
+
+    def setUp(self):
+        fd, config = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({}, f)
+        self.addCleanup(os.unlink, config)
+        self.server = server.ClassicMacHardwareServer(config)
+
+    def list_entries(self, newline: bytes, blocksize: int = 7):
+        listing = newline.join(self.LINES) + newline
+        return self.server._list_entries(FakeListingFTP(listing, blocksize))
+
+    def test_crlf_listing(self):
+        self.assertEqual(self.list_entries(b'\r\n'), self.EXPECTED)
+
+    def test_lf_listing(self):
+        self.assertEqual(self.list_entries(b'\n'), self.EXPECTED)
+
+    def test_bare_cr_listing(self):
+        # Classic Mac servers end LIST lines with a bare CR
+        self.assertEqual(self.list_entries(b'\r'), self.EXPECTED)
+
+    def test_crlf_split_across_blocks(self):
+        # Every block boundary falls somewhere different, including
+        # between a line's CR and its LF
+        for blocksize in range(1, 20):
+            self.assertEqual(self.list_entries(b'\r\n', blocksize), self.EXPECTED)
+
+
+class SplitPathTest(unittest.TestCase):
+    split_path = staticmethod(server.ClassicMacHardwareServer._split_path)
+
+    def test_colon_path(self):
+        self.assertEqual(self.split_path('Documents:TestData:file.txt'),
+                         ('Documents:TestData', 'file.txt'))
+
+    def test_slash_path(self):
+        # Slash paths keep their slashes so '/' servers can CWD to them
+        self.assertEqual(self.split_path('/Documents/TestData/file.txt'),
+                         ('/Documents/TestData', 'file.txt'))
+        self.assertEqual(self.split_path('Documents/file.txt'),
+                         ('Documents', 'file.txt'))
+
+    def test_root_level_slash_path(self):
+        self.assertEqual(self.split_path('/file.txt'), ('/', 'file.txt'))
+
+    def test_bare_filename(self):
+        self.assertEqual(self.split_path('file.txt'), ('', 'file.txt'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,10 +9,12 @@ Extracts:
 - Chapter/section boundaries
 """
 
+import functools
 import json
 import re
+import sys
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set, Tuple
 
 BOOKS_DIR = Path(__file__).parent.parent.parent / "books"
 INDEX_DIR = Path(__file__).parent / "index"
@@ -57,111 +59,113 @@ TABLES = {
     }
 }
 
-def extract_table(book_path: Path, start: int, end: int) -> List[str]:
-    """Extract function names from a table section."""
-
-    # Common words that appear in tables but aren't functions
-    COMMON_WORDS = {
-        # Table column values
-        'yes', 'no', 'n/a', 'None', 'asynchronous',
-        # Table headers
-        'Function', 'Calling', 'Needs', 'Atomic', 'restrictions', 'Native', 'Note',
-        # Description words from multi-line table cells
-        'only', 'foreground', 'background', 'task', 'calling', 'provide',
-        'this', 'with', 'that', 'from', 'must', 'some', 'Some', 'other', 'factor',
-        # Common English words
-        'If', 'In', 'at', 'in', 'or', 'and', 'the', 'A', 'an', 'of', 'to', 'for',
-        # Table formatting / appendix titles
-        'Continued', 'Table', 'Volume', 'Special', 'Functions',
-        # OCR fragments (too short to be real functions)
-        'AOn', 'BOn', 'Exp', 'Leg',
-    }
+# Separators after a table entry's name ("GetLocalZones *", "IPCListPorts +")
+_SPLIT_RE = re.compile(r'[\s*+‡†]+')
+# MacTCP result code names, and Open Transport kOT... constants
+_MACTCP_ERR_RE = re.compile(r'(connection\w+|insufficient\w+|ip\w+Error)', re.IGNORECASE)
+_KOT_RE = re.compile(r'(kOT\w+)')
+
+# Table lines that are headers or rules, never entries
+_SKIP_PREFIXES = ('Table', '—', 'Function', 'Needs', 'Atomic', 'Calling')
+# Entry tokens that are table/appendix markers (B-3, C-1, ...)
+_TABLE_MARKER_PREFIXES = ('Table', 'B-', 'A-', 'C-', 'D-', 'E-')
+# Common words that appear in tables but aren't functions
+_COMMON_WORDS = frozenset({
+    # Table column values
+    'yes', 'no', 'n/a', 'None', 'asynchronous',
+    # Table headers
+    'Function', 'Calling', 'Needs', 'Atomic', 'restrictions', 'Native', 'Note',
+    # Description words from multi-line table cells
+    'only', 'foreground', 'background', 'task', 'calling', 'provide',
+    'this', 'with', 'that', 'from', 'must', 'some', 'Some', 'other', 'factor',
+    # Common English words
+    'If', 'In', 'at', 'in', 'or', 'and', 'the', 'A', 'an', 'of', 'to', 'for',
+    # Table formatting / appendix titles
+    'Continued', 'Table', 'Volume', 'Special', 'Functions',
+    # OCR fragments (too short to be real functions)
+    'AOn', 'BOn', 'Exp', 'Leg',
+})
+# What a table entry's name looks like; anything else is junk
+_FUNC_OK = re.compile(r'[A-Z][A-Za-z0-9_]{2,}\Z').match
+
+@functools.lru_cache(maxsize=None)
+def read_book_lines(book_path: Path) -> Optional[List[bytes]]:
+    """
+    Return a book's raw lines (line N is item N-1), or None if it's missing.
+
+    Each book is read once per run, however many tables and scans use it.
+    Lines stay undecoded bytes so callers decode only what they keep; the
+    books are LF-terminated, so this numbers lines as text mode does.
+    """
+    try:
+        return book_path.read_bytes().split(b'\n')
+    except FileNotFoundError:
+        return None
 
+def extract_table(book_path: Path, start: int, end: int) -> List[str]:
+    """Extract function names from lines start..end (1-based, inclusive) of a book."""
     functions = []
-    with open(book_path, 'r', encoding='utf-8', errors='ignore') as f:
-        for i, line in enumerate(f, 1):
-            if i < start:
-                continue
-            if i > end:
-                break
-
-            line = line.strip()
-            # Skip empty lines, headers, table markers
-            if not line or line.startswith('Table') or line.startswith('—') or \
-               line.startswith('Function') or line.startswith('Needs') or \
-               line.startswith('Atomic') or line.startswith('Calling') or \
-               len(line) < 3:
-                continue
-
-            # Extract function name (before any spaces, tabs, or special chars)
-            # Handle entries like "GetLocalZones *" or "IPCListPorts +"
-            func = re.split(r'[\s\*\+\‡†]+', line)[0]
-
-            # Skip if empty after split
-            if not func:
-                continue
-
-            # === COMPREHENSIVE JUNK FILTERING ===
-
-            # 1. Basic sanity checks
-            if func.isdigit():
-                continue
-            if len(func) < 3:  # Most Mac functions are 3+ chars
-                continue
-
-            # 2. Must start with uppercase letter (Mac API convention)
-            # Exception: all-caps acronyms like RGB2CMY
-            if not func[0].isupper():
-                continue
-
-            # 3. Must contain at least some alphanumeric characters
-            if not any(c.isalnum() for c in func):
-                continue
-
-            # 4. OCR artifacts - starts with special characters
-            if func[0] in ['[', ']', '{', '}', '|', '§', '(', ')', '=', '—']:
-                continue
-
-            # 5. OCR artifacts - ends with special characters
-            if len(func) > 0 and func[-1] in ['!', '?', '|', '§', '=', '—']:
-                continue
-
-            # 6. Contains problematic characters (OCR errors)
-            if any(c in func for c in ['|', '§', '†', '‡']):
-                continue
-
-            # 7. Starts with table markers
-            if any(func.startswith(prefix) for prefix in ['Table', 'B-', 'A-', 'C-', 'D-', 'E-']):
-                continue
+    # Only the table's own lines are decoded
+    for raw in read_book_lines(book_path)[start - 1:end]:
+        line = raw.decode('utf-8', 'ignore').strip()
+        # Skip empty lines, headers, table markers
+        if not line or line.startswith(_SKIP_PREFIXES) or len(line) < 3:
+            continue
 
-            # 8. Common words exclusion list
-            if func in COMMON_WORDS:
-                continue
+        # Extract function name (before any spaces, tabs, or special chars)
+        # Handle entries like "GetLocalZones *" or "IPCListPorts +"
+        # (only the first token is needed, so stop after one split)
+        func = _SPLIT_RE.split(line, maxsplit=1)[0]
+
+        # === COMPREHENSIVE JUNK FILTERING ===
+        # 1. Shape: uppercase first letter (Mac API convention, including
+        # all-caps acronyms like RGB2CMY), then identifier characters, 3+
+        # chars in all. One C-level match rejects empty, short, numeric and
+        # lowercase tokens, prose, and OCR artifacts (| § † ‡ ! ? = — ...)
+        if not _FUNC_OK(func):
+            continue
 
-            # 9. All lowercase (descriptions, not function names)
-            if func.islower():
-                continue
+        # 2. Common words exclusion list
+        if func in _COMMON_WORDS:
+            continue
 
-            # 10. Numeric prefixes (like "1UCompPString" - keep these, they're real but odd)
-            # They're actual Mac functions with version indicators
+        # 3. Starts with table markers
+        if func.startswith(_TABLE_MARKER_PREFIXES):
+            continue
 
-            # If it passes all filters, add it
-            functions.append(func)
+        # If it passes all filters, add it; names recur across tables
+        # and become index keys, so keep one shared copy of each
+        functions.append(sys.intern(func))
 
     return functions
 
-def build_function_index() -> Dict:
-    """Build index of all functions and their locations."""
+def build_indexes() -> Tuple[Dict, Dict]:
+    """
+    Build the function index and the tables index in one pass.
+
+    Both come from the same six table extractions, so each table is parsed
+    once and feeds the per-function metadata and its own table entry.
+    Returns (functions, tables_index).
+    """
     functions = {}
+    tables_index = {}
 
     # Add functions from tables with interrupt safety info
     for table_id, table_info in TABLES.items():
         book_path = BOOKS_DIR / table_info["book"]
-        if not book_path.exists():
+        if read_book_lines(book_path) is None:
             continue
 
         table_functions = extract_table(book_path, table_info["start"], table_info["end"])
 
+        tables_index[table_id] = {
+            "book": table_info["book"],
+            "description": table_info["description"],
+            "lines": [table_info["start"], table_info["end"]],
+            "function_count": len(table_functions),
+            "functions": sorted(table_functions)
+        }
+
         # Determine interrupt safety from table type
         # Table B-3: Routines safe at interrupt time
         # Table C-1/C-2: OT functions callable at hardware interrupt time
@@ -172,8 +176,10 @@ def build_function_index() -> Dict:
         moves_memory = "moves_memory" in table_id
 
         for func in table_functions:
-            if func not in functions:
-                functions[func] = {
+            # One lookup per name; the entry is only built for new names
+            entry = functions.get(func)
+            if entry is None:
+                entry = functions[func] = {
                     "book": table_info["book"],
                     "lines": [],
                     "tables": [],
@@ -181,12 +187,12 @@ def build_function_index() -> Dict:
                     "moves_memory": None
                 }
 
-            functions[func]["tables"].append(table_id)
+            entry["tables"].append(table_id)
             if interrupt_safe:
-                functions[func]["interrupt_safe"] = True
+                entry["interrupt_safe"] = True
             if moves_memory:
-                functions[func]["moves_memory"] = True
-                functions[func]["interrupt_safe"] = False
+                entry["moves_memory"] = True
+                entry["interrupt_safe"] = False
 
     # Second pass: Detect functions in conflicting tables (sync vs async)
     # Per IM Vol VI Appendix B: Some routines have different behavior when
@@ -207,28 +213,7 @@ def build_function_index() -> Dict:
             info["sync_async_dependent"] = True
             # Keep moves_memory flag if set (for sync version)
 
-    return functions
-
-def build_tables_index() -> Dict:
-    """Build index of table contents."""
-    tables_index = {}
-
-    for table_id, table_info in TABLES.items():
-        book_path = BOOKS_DIR / table_info["book"]
-        if not book_path.exists():
-            continue
-
-        functions = extract_table(book_path, table_info["start"], table_info["end"])
-
-        tables_index[table_id] = {
-            "book": table_info["book"],
-            "description": table_info["description"],
-            "lines": [table_info["start"], table_info["end"]],
-            "function_count": len(functions),
-            "functions": sorted(functions)
-        }
-
-    return tables_index
+    return functions, tables_index
 
 def extract_error_codes() -> Dict:
     """Extract error codes from books."""
@@ -240,35 +225,42 @@ def extract_error_codes() -> Dict:
 
     # MacTCP errors (lines 5939-6120)
     mactcp_path = BOOKS_DIR / "MacTCP_Programmers_Guide_1989.txt"
-    if mactcp_path.exists():
-        with open(mactcp_path, 'r', encoding='utf-8', errors='ignore') as f:
-            for i, line in enumerate(f, 1):
-                if 5939 <= i <= 6120:
-                    # Look for error names
-                    match = re.search(r'(connection\w+|insufficient\w+|ip\w+Error)', line, re.IGNORECASE)
-                    if match:
-                        error_name = match.group(1)
-                        error_codes["MacTCP"][error_name] = {
-                            "line": i,
-                            "book": "MacTCP_Programmers_Guide_1989.txt",
-                            "context": line.strip()
-                        }
+    mactcp_lines = read_book_lines(mactcp_path)
+    if mactcp_lines is not None:
+        search = _MACTCP_ERR_RE.search
+        for i, raw in enumerate(mactcp_lines[5938:6120], 5939):
+            line = raw.decode('utf-8', 'ignore')
+            # Look for error names
+            match = search(line)
+            if match:
+                error_name = match.group(1)
+                error_codes["MacTCP"][error_name] = {
+                    "line": i,
+                    "book": "MacTCP_Programmers_Guide_1989.txt",
+                    "context": line.strip()
+                }
 
     # Open Transport errors (Table B-1 around line 42307)
     ot_path = BOOKS_DIR / "NetworkingOpenTransport.txt"
-    if ot_path.exists():
-        with open(ot_path, 'r', encoding='utf-8', errors='ignore') as f:
-            for i, line in enumerate(f, 1):
-                # Look for kOT error codes
-                match = re.search(r'(kOT\w+)', line)
-                if match:
-                    error_name = match.group(1)
-                    if error_name not in error_codes["OpenTransport"]:
-                        error_codes["OpenTransport"][error_name] = {
-                            "line": i,
-                            "book": "NetworkingOpenTransport.txt",
-                            "context": line.strip()[:100]
-                        }
+    ot_lines = read_book_lines(ot_path)  # Already read for tables C-1..C-3
+    if ot_lines is not None:
+        search = _KOT_RE.search
+        for i, raw in enumerate(ot_lines, 1):
+            # Look for kOT error codes. Few lines mention one: a substring
+            # test on the raw bytes skips the rest without decoding them or
+            # entering the regex engine
+            if b'kOT' not in raw:
+                continue
+            line = raw.decode('utf-8', 'ignore')
+            match = search(line)
+            if match:
+                error_name = match.group(1)
+                if error_name not in error_codes["OpenTransport"]:
+                    error_codes["OpenTransport"][error_name] = {
+                        "line": i,
+                        "book": "NetworkingOpenTransport.txt",
+                        "context": line.strip()[:100]
+                    }
 
     return error_codes
 
@@ -310,33 +302,28 @@ def main():
 
     print("Building book indexes...")
 
-    # Build function index
+    # Build function and tables indexes (one pass over the tables)
     print("  - Extracting functions from tables...")
-    functions = build_function_index()
-    with open(INDEX_DIR / "functions.json", 'w') as f:
-        json.dump(functions, f, indent=2, sort_keys=True)
+    functions, tables = build_indexes()
+    (INDEX_DIR / "functions.json").write_text(json.dumps(functions, indent=2, sort_keys=True))
     print(f"    Found {len(functions)} functions")
 
     # Build tables index
     print("  - Building tables index...")
-    tables = build_tables_index()
-    with open(INDEX_DIR / "tables.json", 'w') as f:
-        json.dump(tables, f, indent=2)
+    (INDEX_DIR / "tables.json").write_text(json.dumps(tables, indent=2))
     print(f"    Indexed {len(tables)} tables")
 
     # Extract error codes
     print("  - Extracting error codes...")
     errors = extract_error_codes()
-    with open(INDEX_DIR / "error_codes.json", 'w') as f:
-        json.dump(errors, f, indent=2, sort_keys=True)
+    (INDEX_DIR / "error_codes.json").write_text(json.dumps(errors, indent=2, sort_keys=True))
     total_errors = sum(len(v) for v in errors.values())
     print(f"    Found {total_errors} error codes")
 
     # Build keyword index
     print("  - Building keyword index...")
     keywords = build_keyword_index()
-    with open(INDEX_DIR / "keywords.json", 'w') as f:
-        json.dump(keywords, f, indent=2)
+    (INDEX_DIR / "keywords.json").write_text(json.dumps(keywords, indent=2))
     print(f"    Indexed {len(keywords)} keyword categories")
 
     print("\nIndexes built successfully!")
@@ -25,12 +25,16 @@ import os
 from datetime import datetime, timezone
 from pathlib import Path
 
+# UTC, second precision, as in the dashboard's metrics files
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
 
 def load_json_safe(path: Path) -> dict:
     """Load JSON file, returning empty dict if not found or invalid."""
     try:
-        if path.exists():
-            return json.loads(path.read_text())
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        pass
     except (json.JSONDecodeError, IOError) as e:
         print(f"Warning: Could not load {path}: {e}", file=sys.stderr)
     return {}
@@ -75,7 +79,7 @@ def main():
 
         # Aggregate
         aggregated = {
-            "timestamp": datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+            "timestamp": datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT),
             "commit": os.environ.get("GITHUB_SHA", "unknown")[:7],
             "branch": os.environ.get("GITHUB_REF_NAME", "unknown"),
             "test_results": test_data,
@@ -4,36 +4,41 @@
 import xml.etree.ElementTree as ET
 import sys
 
+# How many errors/warnings are listed in full
+MAX_CRITICAL_SHOWN = 30
+
 def main():
     xml_file = sys.argv[1] if len(sys.argv) > 1 else "build/analysis/cppcheck-full.xml"
 
-    try:
-        tree = ET.parse(xml_file)
-        root = tree.getroot()
-    except Exception as e:
-        print(f"Failed to parse XML: {e}")
-        sys.exit(0)
-
     severity_counts = {}
-    issues = []
+    # Only the errors/warnings that get printed are kept; the rest are counted
+    critical = []
+    critical_count = 0
 
-    errors = root.find("errors")
-    if errors is not None:
-        for error in errors.findall("error"):
+    # Stream the report: each <error> is read once its end tag arrives,
+    # then cleared, so a large run never holds the whole tree in memory
+    try:
+        for _, error in ET.iterparse(xml_file):
+            if error.tag != "error":
+                continue
             sev = error.get("severity", "unknown")
             severity_counts[sev] = severity_counts.get(sev, 0) + 1
 
-            loc = error.find("location")
-            file_path = loc.get("file", "") if loc is not None else ""
-            line = loc.get("line", "0") if loc is not None else "0"
-
-            issues.append({
-                "severity": sev,
-                "id": error.get("id", ""),
-                "msg": error.get("msg", ""),
-                "file": file_path,
-                "line": line
-            })
+            if sev in ("error", "warning"):
+                critical_count += 1
+                if len(critical) < MAX_CRITICAL_SHOWN:
+                    loc = error.find("location")
+                    critical.append({
+                        "severity": sev,
+                        "id": error.get("id", ""),
+                        "msg": error.get("msg", ""),
+                        "file": loc.get("file", "") if loc is not None else "",
+                        "line": loc.get("line", "0") if loc is not None else "0"
+                    })
+            error.clear()
+    except Exception as e:
+        print(f"Failed to parse XML: {e}")
+        sys.exit(0)
 
     print("=" * 60)
     print("CPPCHECK FULL ANALYSIS (--force)")
@@ -43,19 +48,18 @@ def main():
     for sev in ["error", "warning", "style", "performance", "portability", "information"]:
         if sev in severity_counts:
             print(f"  {sev}: {severity_counts[sev]}")
-    print(f"  TOTAL: {len(issues)}")
+    print(f"  TOTAL: {sum(severity_counts.values())}")
     print()
 
-    critical = [i for i in issues if i["severity"] in ("error", "warning")]
     if critical:
         print("Errors and Warnings:")
         print("-" * 60)
-        for i in critical[:30]:
+        for i in critical:
             print(f"[{i['severity'].upper()}] {i['file']}:{i['line']}")
             print(f"  {i['id']}: {i['msg'][:100]}")
             print()
-        if len(critical) > 30:
-            print(f"... and {len(critical) - 30} more")
+        if critical_count > len(critical):
+            print(f"... and {critical_count - len(critical)} more")
     else:
         print("No errors or warnings found.")
 
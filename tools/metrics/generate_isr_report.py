@@ -3,6 +3,7 @@
 
 import json
 import sys
+from html import escape
 from pathlib import Path
 from datetime import datetime, timezone
 
@@ -131,28 +132,39 @@ HTML_TEMPLATE = """<!DOCTYPE html>
 </body>
 </html>
 """
+# The report is written as the head, the content chunks, then the tail
+HTML_HEAD, HTML_TAIL = HTML_TEMPLATE.split("{content}")
 
-def main():
-    if len(sys.argv) != 3:
-        print("Usage: generate_isr_report.py <isr_json> <output_html>")
-        sys.exit(1)
-
-    isr_file = sys.argv[1]
-    output_file = sys.argv[2]
-
-    # Load ISR data
-    data = json.loads(Path(isr_file).read_text())
+# One violation's table row, filled with %: url, file, line, callback,
+# forbidden call, category, reason, context block
+ROW_TEMPLATE = """
+            <tr>
+                <td>
+                    <a href="%s" class="file-link" target="_blank">%s:%s</a>
+                </td>
+                <td>%s</td>
+                <td><code>%s</code></td>
+                <td><span class="category-badge">%s</span></td>
+                <td>
+                    %s
+                    %s
+                </td>
+            </tr>
+            """
+CONTEXT_TEMPLATE = '<div class="code-context">%s</div>'
 
-    total = data['total_violations']
-    by_category = data['by_category']
-    violations = data.get('violations', [])
+def render_html(violations: list, by_category: dict, total: int, output_file) -> None:
+    """Write the HTML report for already-structured ISR data.
 
+    Takes the fields of isr_safety.py's JSON output, so the validator can
+    render in-process (--html-out) without a JSON round trip.
+    """
     # Determine summary color
     summary_color = "var(--color-success)" if total == 0 else "var(--color-error)"
 
-    # Generate content
+    # Generate content (as chunks, so rows are written without joining)
     if total == 0:
-        content = '''
+        content = ['''
         <div class="success-message">
             <svg fill="currentColor" viewBox="0 0 20 20">
                 <path fill-rule="evenodd" d="M10 18a8 8 0 100-16 8 8 0 000 16zm3.707-9.293a1 1 0 00-1.414-1.414L9 10.586 7.707 9.293a1 1 0 00-1.414 1.414l2 2a1 1 0 001.414 0l4-4z" clip-rule="evenodd"/>
@@ -162,7 +174,7 @@ def main():
                 All interrupt-time code follows safe practices.
             </p>
         </div>
-        '''
+        ''']
     else:
         violations_html = []
         for v in violations:
@@ -177,22 +189,14 @@ def main():
             # Generate GitHub link
             github_url = f"https://github.com/matthewdeaves/peertalk/blob/develop/{file}#L{line}"
 
-            violations_html.append(f'''
-            <tr>
-                <td>
-                    <a href="{github_url}" class="file-link" target="_blank">{file}:{line}</a>
-                </td>
-                <td>{callback_name}</td>
-                <td><code>{forbidden_call}</code></td>
-                <td><span class="category-badge">{category}</span></td>
-                <td>
-                    {reason}
-                    {f'<div class="code-context">{context}</div>' if context else ''}
-                </td>
-            </tr>
-            ''')
+            # Every field is escaped: context is C source ("a < b && c")
+            violations_html.append(ROW_TEMPLATE % (
+                escape(github_url), escape(file), escape(str(line)),
+                escape(callback_name), escape(forbidden_call), escape(category),
+                escape(reason), CONTEXT_TEMPLATE % escape(context) if context else '',
+            ))
 
-        content = f'''
+        content = [f'''
         <div class="violations">
             <h2>Violations ({len(violations)})</h2>
             <table>
@@ -206,11 +210,13 @@ def main():
                     </tr>
                 </thead>
                 <tbody>
-                    {"".join(violations_html) if violations_html else '<tr><td colspan="5">No detailed violation data available.</td></tr>'}
+                    ''']
+        content.extend(violations_html or ['<tr><td colspan="5">No detailed violation data available.</td></tr>'])
+        content.append('''
                 </tbody>
             </table>
         </div>
-        '''
+        ''')
 
     # Generate category stats
     category_stats_html = []
@@ -220,21 +226,38 @@ def main():
         category_stats_html.append(f'''
                 <div class="stat">
                     <div class="stat-value">{count}</div>
-                    <div class="stat-label">{display_name}</div>
+                    <div class="stat-label">{escape(display_name)}</div>
                 </div>
         ''')
 
-    # Generate HTML
-    html = HTML_TEMPLATE.format(
+    # Generate HTML, streaming the content chunks straight to the file
+    head = HTML_HEAD.format(
         timestamp=datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
         total_violations=total,
         category_stats=''.join(category_stats_html),
         summary_color=summary_color,
-        content=content
     )
 
     # Write output
-    Path(output_file).write_text(html)
+    with open(output_file, 'w', buffering=1 << 20) as f:
+        f.write(head)
+        f.writelines(content)
+        f.write(HTML_TAIL)
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage: generate_isr_report.py <isr_json> <output_html>")
+        sys.exit(1)
+
+    isr_file = sys.argv[1]
+    output_file = sys.argv[2]
+
+    # Load ISR data
+    data = json.loads(Path(isr_file).read_text())
+
+    render_html(
+        data.get('violations', []), data['by_category'], data['total_violations'], output_file
+    )
     print(f"✓ ISR safety report written to {output_file}")
 
 if __name__ == "__main__":
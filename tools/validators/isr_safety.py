@@ -8,6 +8,8 @@ Usage:
     python tools/validators/isr_safety.py src/mactcp/
     python tools/validators/isr_safety.py src/mactcp/tcp_mactcp.c
     python tools/validators/isr_safety.py --check-content "code here"
+    python tools/validators/isr_safety.py --check-content - < file.c
+    python tools/validators/isr_safety.py src/ --html-out isr_report.html
 
 Exit codes:
     0 - No violations found
@@ -15,22 +17,58 @@ Exit codes:
     2 - Error (file not found, etc.)
 """
 
+import argparse
+import bisect
+import functools
 import os
 import re
 import sys
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Optional
-
-import click
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-
-console = Console()
-
-
-@dataclass
+from itertools import groupby
+from operator import attrgetter
+
+# Block comment on a single line
+BLOCK_COMMENT_RE = re.compile(r"/\*.*?\*/")
+# A call: identifier + parenthesis. Group 1 is looked up in the forbidden
+# calls, so the scan costs the same however large the database grows
+CALL_RE = re.compile(r"\b(\w+)\s*\(")
+# Every callback pattern needs one of these; code with none has no callbacks
+CALLBACK_MARKERS = ("_asr", "_notifier", "_completion", "_callback", "_event", "pascal")
+# Patterns for callback functions, compiled once. They are tried in this
+# order, which decides which match wins when patterns overlap
+CALLBACK_PATTERNS = tuple(re.compile(pattern, re.MULTILINE) for pattern in (
+    # Named patterns
+    r"(?:static\s+)?(?:pascal\s+)?(?:void|OSErr)\s+(\w+_asr)\s*\(",
+    r"(?:static\s+)?(?:pascal\s+)?(?:void|OSErr)\s+(\w+_notifier)\s*\(",
+    r"(?:static\s+)?(?:pascal\s+)?(?:void|OSErr)\s+(\w+_completion)\s*\(",
+    r"(?:static\s+)?(?:pascal\s+)?(?:void|OSErr)\s+(\w+_callback)\s*\(",
+    r"(?:static\s+)?(?:pascal\s+)?(?:void|OSErr)\s+(\w+_event)\s*\(",
+    # Pascal callback signatures (MacTCP ASR)
+    r"(?:static\s+)?pascal\s+void\s+(\w+)\s*\(\s*StreamPtr",
+    # OT notifier signature
+    r"(?:static\s+)?pascal\s+void\s+(\w+)\s*\(\s*void\s*\*\s*\w*\s*,\s*OTEventCode",
+    # ADSP completion signature
+    r"(?:static\s+)?pascal\s+void\s+(\w+)\s*\(\s*DSPPBPtr",
+    r"(?:static\s+)?pascal\s+void\s+(\w+)\s*\(\s*TPCCB",
+))
+
+
+# Created on first use, so --quiet and --json runs never import rich
+_console = None
+
+
+def get_console():
+    """Return the shared rich Console, importing rich on first use."""
+    global _console
+    if _console is None:
+        from rich.console import Console
+
+        _console = Console()
+    return _console
+
+
+@dataclass(slots=True, frozen=True)
 class ForbiddenCall:
     """A forbidden function call."""
 
@@ -39,7 +77,7 @@ class ForbiddenCall:
     reason: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Violation:
     """A detected ISR safety violation."""
 
@@ -52,13 +90,17 @@ class Violation:
     context: str  # Line of code
 
 
+@functools.lru_cache(maxsize=None)
 def load_forbidden_calls() -> dict[str, ForbiddenCall]:
-    """Load forbidden calls from database file."""
+    """Load forbidden calls from database file.
+
+    The database is read once per run; callers share the returned dict.
+    """
     db_path = Path(__file__).parent / "forbidden_calls.txt"
     forbidden = {}
 
     if not db_path.exists():
-        console.print(f"[red]Forbidden calls database not found: {db_path}[/red]")
+        get_console().print(f"[red]Forbidden calls database not found: {db_path}[/red]")
         sys.exit(2)
 
     with open(db_path) as f:
@@ -82,100 +124,94 @@ def find_callback_functions(code: str) -> list[tuple[str, int, int]]:
 
     Returns list of (function_name, start_line, end_line).
     """
-    callbacks = []
+    # Cheap substring test before running the patterns over the file
+    if not any(marker in code for marker in CALLBACK_MARKERS):
+        return []
 
-    # Patterns for callback functions
-    patterns = [
-        # Named patterns
-        r"(?:static\s+)?(?:pascal\s+)?(?:void|OSErr)\s+(\w+_asr)\s*\(",
-        r"(?:static\s+)?(?:pascal\s+)?(?:void|OSErr)\s+(\w+_notifier)\s*\(",
-        r"(?:static\s+)?(?:pascal\s+)?(?:void|OSErr)\s+(\w+_completion)\s*\(",
-        r"(?:static\s+)?(?:pascal\s+)?(?:void|OSErr)\s+(\w+_callback)\s*\(",
-        r"(?:static\s+)?(?:pascal\s+)?(?:void|OSErr)\s+(\w+_event)\s*\(",
-        # Pascal callback signatures (MacTCP ASR)
-        r"(?:static\s+)?pascal\s+void\s+(\w+)\s*\(\s*StreamPtr",
-        # OT notifier signature
-        r"(?:static\s+)?pascal\s+void\s+(\w+)\s*\(\s*void\s*\*\s*\w*\s*,\s*OTEventCode",
-        # ADSP completion signature
-        r"(?:static\s+)?pascal\s+void\s+(\w+)\s*\(\s*DSPPBPtr",
-        r"(?:static\s+)?pascal\s+void\s+(\w+)\s*\(\s*TPCCB",
-    ]
+    callbacks = []
+    # Names already found (the same function can match several patterns)
+    seen = set()
 
-    lines = code.split("\n")
+    # Offsets of every newline: the line holding offset pos is one more
+    # than the number of newlines before it
+    newlines = [m.start() for m in re.finditer("\n", code)]
+    # Offsets of every brace, so matching skips straight between them
+    braces = [m.start() for m in re.finditer(r"[{}]", code)]
 
-    for pattern in patterns:
-        for match in re.finditer(pattern, code, re.MULTILINE):
+    for pattern in CALLBACK_PATTERNS:
+        for match in pattern.finditer(code):
             func_name = match.group(1)
+            if func_name in seen:
+                continue
             # Find line number
             pos = match.start()
-            line_num = code[:pos].count("\n") + 1
+            line_num = bisect.bisect_left(newlines, pos) + 1
 
             # Find function end (matching braces)
             func_start = code.find("{", pos)
             if func_start == -1:
                 continue
 
+            # Runs to the end of the code if the braces never balance
             brace_count = 1
-            func_end = func_start + 1
-            while brace_count > 0 and func_end < len(code):
-                if code[func_end] == "{":
-                    brace_count += 1
-                elif code[func_end] == "}":
-                    brace_count -= 1
-                func_end += 1
-
-            end_line = code[:func_end].count("\n") + 1
+            func_end = len(code)
+            for brace in braces[bisect.bisect_right(braces, func_start):]:
+                brace_count += 1 if code[brace] == "{" else -1
+                if brace_count == 0:
+                    func_end = brace + 1
+                    break
+
+            end_line = bisect.bisect_left(newlines, func_end) + 1
+            seen.add(func_name)
             callbacks.append((func_name, line_num, end_line))
 
-    # Remove duplicates (same function matched by multiple patterns)
-    seen = set()
-    unique = []
-    for cb in callbacks:
-        if cb[0] not in seen:
-            seen.add(cb[0])
-            unique.append(cb)
-
-    return unique
+    return callbacks
 
 
 def check_function_for_violations(
-    code: str,
+    lines: list[str],
     func_name: str,
     start_line: int,
     end_line: int,
     forbidden: dict[str, ForbiddenCall],
     filename: str,
 ) -> list[Violation]:
-    """Check a callback function for forbidden calls."""
+    """Check a callback function for forbidden calls.
+
+    lines is the file's source split on newlines.
+    """
     violations = []
-    lines = code.split("\n")
 
     # Extract function body
     func_lines = lines[start_line - 1 : end_line]
-    func_body = "\n".join(func_lines)
 
+    # Lines each forbidden call appears on, from one scan of the body
+    hits: dict[str, list[int]] = {}
+    for i, line in enumerate(func_lines):
+        # Skip comments
+        line_stripped = line.partition("//")[0]  # Remove line comments
+        # Remove block comments (simple version)
+        if "/*" in line_stripped:
+            line_stripped = BLOCK_COMMENT_RE.sub("", line_stripped)
+
+        for call_name in set(CALL_RE.findall(line_stripped)):
+            if call_name in forbidden:
+                hits.setdefault(call_name, []).append(i)
+
+    # Report in database order, as a per-call scan would
     for call_name, call_info in forbidden.items():
-        # Look for function calls (word boundary + parenthesis)
-        pattern = rf"\b{re.escape(call_name)}\s*\("
-
-        for i, line in enumerate(func_lines):
-            # Skip comments
-            line_stripped = line.split("//")[0]  # Remove line comments
-            # Remove block comments (simple version)
-            line_stripped = re.sub(r"/\*.*?\*/", "", line_stripped)
-
-            if re.search(pattern, line_stripped):
-                violations.append(
-                    Violation(
-                        file=filename,
-                        line=start_line + i,
-                        callback_name=func_name,
-                        forbidden_call=call_name,
-                        category=call_info.category,
-                        reason=call_info.reason,
-                        context=line.strip(),
-                    )
+        for i in hits.get(call_name, ()):
+            violations.append(
+                Violation(
+                    file=filename,
+                    line=start_line + i,
+                    callback_name=func_name,
+                    forbidden_call=call_name,
+                    category=call_info.category,
+                    reason=call_info.reason,
+                    context=func_lines[i].strip(),
                 )
+            )
 
     return violations
 
@@ -187,10 +223,14 @@ def check_content(code: str, filename: str = "<stdin>") -> list[Violation]:
 
     # Find callback functions
     callbacks = find_callback_functions(code)
+    if not callbacks:
+        return all_violations
+    # Split once; every callback slices its body from the same lines
+    lines = code.split("\n")
 
     for func_name, start_line, end_line in callbacks:
         violations = check_function_for_violations(
-            code, func_name, start_line, end_line, forbidden, filename
+            lines, func_name, start_line, end_line, forbidden, filename
         )
         all_violations.extend(violations)
 
@@ -203,7 +243,7 @@ def check_file(filepath: Path) -> list[Violation]:
         code = filepath.read_text(encoding="utf-8", errors="replace")
         return check_content(code, str(filepath))
     except Exception as e:
-        console.print(f"[red]Error reading {filepath}: {e}[/red]")
+        get_console().print(f"[red]Error reading {filepath}: {e}[/red]")
         return []
 
 
@@ -220,6 +260,10 @@ def check_directory(dirpath: Path) -> list[Violation]:
 
 def display_violations(violations: list[Violation]):
     """Display violations in a formatted table."""
+    from rich.panel import Panel
+    from rich.table import Table
+
+    console = get_console()
     if not violations:
         console.print("[green]No ISR safety violations found.[/green]")
         return
@@ -232,14 +276,9 @@ def display_violations(violations: list[Violation]):
     )
     console.print()
 
-    # Group by file
-    by_file: dict[str, list[Violation]] = {}
-    for v in violations:
-        if v.file not in by_file:
-            by_file[v.file] = []
-        by_file[v.file].append(v)
-
-    for filename, file_violations in by_file.items():
+    # Group by file, each file's violations in line order
+    ordered = sorted(violations, key=attrgetter("file", "line"))
+    for filename, file_violations in groupby(ordered, key=attrgetter("file")):
         console.print(f"[bold]{filename}[/bold]")
 
         table = Table(show_header=True, header_style="bold")
@@ -248,7 +287,7 @@ def display_violations(violations: list[Violation]):
         table.add_column("Forbidden Call", style="red", width=20)
         table.add_column("Reason", style="white")
 
-        for v in sorted(file_violations, key=lambda x: x.line):
+        for v in file_violations:
             table.add_row(str(v.line), v.callback_name, v.forbidden_call, v.reason)
 
         console.print(table)
@@ -270,19 +309,61 @@ def display_violations(violations: list[Violation]):
         console.print("  - I/O: Set flags only, process in main loop")
 
 
-@click.command()
-@click.argument("target", required=False)
-@click.option("--check-content", "-c", help="Check code content directly (for hooks)")
-@click.option("--quiet", "-q", is_flag=True, help="Only output violations, no decoration")
-@click.option("--json", "-j", "output_json", is_flag=True, help="Output violations as JSON")
-def main(target: Optional[str], check_content: Optional[str], quiet: bool, output_json: bool):
-    """Check Classic Mac callback code for ISR safety violations.
+def violations_report(violations: list[Violation]) -> dict:
+    """Build the --json output: totals, counts by category, and violations."""
+    violations_data = []
+    categories = {}
 
-    TARGET can be a file or directory to scan.
-    """
-    if check_content:
-        # Check content directly (used by hooks)
-        violations = globals()["check_content"](check_content)
+    for v in violations:
+        violations_data.append({
+            "file": v.file,
+            "line": v.line,
+            "callback_name": v.callback_name,
+            "forbidden_call": v.forbidden_call,
+            "category": v.category,
+            "reason": v.reason,
+            "context": v.context
+        })
+        categories[v.category] = categories.get(v.category, 0) + 1
+
+    return {
+        "total_violations": len(violations),
+        "by_category": categories,
+        "violations": violations_data
+    }
+
+
+def write_html_report(violations: list[Violation], output_path: str):
+    """Render the HTML report in-process, skipping the JSON round trip."""
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "metrics"))
+    from generate_isr_report import render_html
+
+    report = violations_report(violations)
+    render_html(
+        report["violations"], report["by_category"], report["total_violations"], output_path
+    )
+
+
+def main():
+    """Check Classic Mac callback code for ISR safety violations."""
+    parser = argparse.ArgumentParser(
+        description="Check Classic Mac callback code for ISR safety violations."
+    )
+    parser.add_argument("target", nargs="?", help="File or directory to scan")
+    parser.add_argument("--check-content", "-c", help="Check code content directly (for hooks); - reads it from stdin")
+    parser.add_argument("--quiet", "-q", action="store_true", help="Only output violations, no decoration")
+    parser.add_argument("--json", "-j", dest="output_json", action="store_true", help="Output violations as JSON")
+    parser.add_argument("--html-out", metavar="PATH", help="Also write the HTML report to PATH")
+    args = parser.parse_args()
+    target, quiet, output_json = args.target, args.quiet, args.output_json
+
+    if args.check_content:
+        # Check content directly (used by hooks); "-" reads it from stdin,
+        # which avoids argv size limits for whole files
+        code = args.check_content
+        if code == "-":
+            code = sys.stdin.buffer.read().decode("utf-8", errors="replace")
+        violations = check_content(code)
     elif target:
         path = Path(target)
         if path.is_file():
@@ -290,7 +371,7 @@ def main(target: Optional[str], check_content: Optional[str], quiet: bool, outpu
         elif path.is_dir():
             violations = check_directory(path)
         else:
-            console.print(f"[red]Target not found: {target}[/red]")
+            get_console().print(f"[red]Target not found: {target}[/red]")
             sys.exit(2)
     else:
         # Default to src/ directories for Mac code
@@ -301,42 +382,24 @@ def main(target: Optional[str], check_content: Optional[str], quiet: bool, outpu
                 violations.extend(check_directory(path))
 
         if not violations and not Path("src").exists():
-            console.print("[yellow]No src/ directory found. Specify a target.[/yellow]")
-            console.print("Usage: python tools/validators/isr_safety.py <file-or-directory>")
+            get_console().print("[yellow]No src/ directory found. Specify a target.[/yellow]")
+            get_console().print("Usage: python tools/validators/isr_safety.py <file-or-directory>")
             sys.exit(0)
 
     if output_json:
         # Output violations as JSON
         import json
 
-        violations_data = []
-        categories = {}
-
-        for v in violations:
-            violations_data.append({
-                "file": v.file,
-                "line": v.line,
-                "callback_name": v.callback_name,
-                "forbidden_call": v.forbidden_call,
-                "category": v.category,
-                "reason": v.reason,
-                "context": v.context
-            })
-            categories[v.category] = categories.get(v.category, 0) + 1
-
-        output = {
-            "total_violations": len(violations),
-            "by_category": categories,
-            "violations": violations_data
-        }
-
-        print(json.dumps(output, indent=2))
+        print(json.dumps(violations_report(violations), indent=2))
     elif quiet:
         for v in violations:
             print(f"{v.file}:{v.line}: {v.forbidden_call} in {v.callback_name} - {v.reason}")
     else:
         display_violations(violations)
 
+    if args.html_out:
+        write_html_report(violations, args.html_out)
+
     # Exit with 1 if violations found
     sys.exit(1 if violations else 0)
 